@@ -0,0 +1,78 @@
+"""Benchmark the chunked ledger report on a synthetic CSV ledger.
+
+Usage: PYTHONPATH=src python benchmarks/bench_report.py [rows] [chunksize] [authors]
+
+The ledger is generated in a child process so the reported RSS is the report's own.
+Throughput and RSS are printed every ``PROGRESS_ROWS`` rows to show how both scale.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from social_crawler.config import LedgerConfig
+from social_crawler.ledger import FIELDNAMES
+from social_crawler.report import LedgerReport, iter_ledger_chunks
+
+WRITE_BATCH = 500_000
+PROGRESS_ROWS = 5_000_000
+
+
+def write_ledger(path: Path, rows: int, authors: int = 200_000, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    subreddits = np.array([f"sub{index}" for index in range(500)])
+    header = True
+    for start in range(0, rows, WRITE_BATCH):
+        size = min(WRITE_BATCH, rows - start)
+        frame = pd.DataFrame({name: "" for name in FIELDNAMES}, index=range(size))
+        frame["post_id"] = np.char.add("p", np.arange(start, start + size).astype(str))
+        frame["created_utc"] = rng.integers(1_500_000_000, 1_700_000_000, size)
+        frame["subreddit"] = subreddits[rng.zipf(1.3, size) % len(subreddits)]
+        frame["author"] = np.char.add("user", rng.integers(0, authors, size).astype(str))
+        frame["media_url"] = np.where(rng.random(size) < 0.3, "https://i.redd.it/x.png", "")
+        frame.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+
+def rss_mib() -> float:
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+def main(argv: list[str]) -> None:
+    rows = int(argv[0]) if argv else 2_000_000
+    chunksize = int(argv[1]) if len(argv) > 1 else 250_000
+    authors = int(argv[2]) if len(argv) > 2 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ledger.csv"
+        writer = multiprocessing.Process(target=write_ledger, args=(path, rows, authors))
+        writer.start()
+        writer.join()
+        baseline_rss = rss_mib()
+        report = LedgerReport()
+        start = mark = time.perf_counter()
+        marked = 0
+        for chunk in iter_ledger_chunks(LedgerConfig(mode="csv", csv_path=path), chunksize=chunksize):
+            report.update(chunk)
+            if report.rows - marked >= PROGRESS_ROWS:
+                now = time.perf_counter()
+                print(f"  rows={report.rows:>11,} rate={(report.rows - marked) / (now - mark):>9,.0f} rows/s rss={rss_mib():,.0f} MiB")
+                mark, marked = now, report.rows
+        summary = report.to_dict()
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and covers only this process.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"rows={summary['rows']} posts={summary['posts']} subreddits={len(summary['subreddits'])} authors={summary['authors']}")
+    print(f"elapsed={elapsed:.2f}s throughput={rows / elapsed:,.0f} rows/s")
+    print(f"peak_rss={peak_rss:,.0f} MiB (before report: {baseline_rss:,.0f} MiB, growth {peak_rss - baseline_rss:,.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
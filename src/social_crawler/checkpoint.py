@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+JOURNAL_VERSION = 1
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Digest of the query settings a journal was written for."""
+    encoded = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def default_journal_path(key: str) -> Path:
+    """Journal path used by ``--resume`` without ``--checkpoint-path``; one file per query config."""
+    return Path(f"checkpoint-{key[:16]}.json")
+
+
+class RunJournal:
+    """Progress of one crawl, persisted so an interrupted run can pick up where it stopped.
+
+    A task is one subreddit (or ``*`` for a site-wide search). The journal records which
+    tasks are complete, the listing cursor of the task in progress, the posts of unfinished
+    tasks that were already processed, and media downloads that were started but not
+    committed. It is rewritten atomically (temp file, fsync, ``os.replace``) at most every
+    ``flush_interval`` seconds and whenever a task completes.
+    """
+
+    def __init__(self, path: Path, key: str, *, flush_interval: float = 5.0) -> None:
+        self.path = Path(path)
+        self.key = key
+        self.flush_interval = flush_interval
+        self.completed: List[str] = []
+        self.cursors: Dict[str, Tuple[str, int]] = {}
+        self.processed: Set[str] = set()
+        self.media: Dict[str, str] = {}  # storage path -> url
+        self.finished = False
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @classmethod
+    def open(cls, path: Path, key: str, *, resume: bool = False, flush_interval: float = 5.0) -> "RunJournal":
+        """Load the journal at ``path`` when resuming the same unfinished crawl, else start fresh."""
+        journal = cls(path, key, flush_interval=flush_interval)
+        if resume and journal.path.exists():
+            state = json.loads(journal.path.read_text(encoding="utf-8"))
+            if state.get("version") == JOURNAL_VERSION and state.get("key") == key and not state.get("finished"):
+                journal.completed = list(state.get("completed", []))
+                journal.cursors = {task: (after, fetched) for task, (after, fetched) in state.get("cursors", {}).items()}
+                journal.processed = set(state.get("processed", []))
+                journal.media = dict(state.get("media", {}))
+        journal.flush()
+        return journal
+
+    def is_complete(self, task: str) -> bool:
+        return task in self.completed
+
+    def cursor(self, task: str) -> Tuple[Optional[str], int]:
+        """Return the ``after`` token and the number of posts fetched before it."""
+        after, fetched = self.cursors.get(task, (None, 0))
+        return after, fetched
+
+    def advance(self, task: str, after: str, fetched: int) -> None:
+        with self._lock:
+            self.cursors[task] = (after, fetched)
+            self._touch()
+
+    def complete(self, task: str) -> None:
+        with self._lock:
+            self.completed.append(task)
+            self.cursors.pop(task, None)
+            self.processed.clear()
+        self.flush()
+
+    def is_processed(self, post_id: str) -> bool:
+        return post_id in self.processed
+
+    def mark_processed(self, post_id: str) -> None:
+        with self._lock:
+            self.processed.add(post_id)
+            self._touch()
+
+    def add_media(self, relative: str, url: str) -> None:
+        with self._lock:
+            self.media[relative] = url
+            self._touch()
+
+    def remove_media(self, relative: str) -> None:
+        with self._lock:
+            self.media.pop(relative, None)
+            self._touch()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.finished = True
+        self.flush()
+
+    def _touch(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._write()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        state = {
+            "version": JOURNAL_VERSION,
+            "key": self.key,
+            "finished": self.finished,
+            "completed": self.completed,
+            "cursors": self.cursors,
+            "processed": sorted(self.processed),
+            "media": self.media,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A unique temp file per write, so processes sharing a directory never move each other's.
+        fd, tmp = tempfile.mkstemp(prefix=f"{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as outfile:
+                json.dump(state, outfile)
+                outfile.flush()
+                os.fsync(outfile.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._last_flush = time.monotonic()
+
+
+__all__ = ["RunJournal", "config_key", "default_journal_path"]
@@ -2,43 +2,101 @@ from __future__ import annotations
 
 import argparse
 import sys
+from typing import TYPE_CHECKING
 
-from dotenv import load_dotenv
+# Heavy dependencies (pydantic, httpx, storage SDKs) are imported inside the functions that
+# need them so ``--help`` and short cron invocations don't pay for them up front.
+if TYPE_CHECKING:  # pragma: no cover
+    from .config import ScraperConfig
 
-from .config import LedgerConfig, QueryConfig, RedditCredentials, ScraperConfig, StorageConfig
-from .scraper import RedditScraper
 
-
-def parse_args(argv: list[str]) -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Reddit scraping utility")
+def _build_parser(*, crawl: bool = True, **kwargs) -> argparse.ArgumentParser:
+    """Options shared by live crawls and ingest; ``crawl`` adds the ones only the API listing uses."""
+    parser = argparse.ArgumentParser(**kwargs)
     parser.add_argument("--query", action="append", default=[], help="Search query string. Repeatable.")
     parser.add_argument("--subreddit", action="append", default=[], help="Target subreddit. Repeatable.")
-    parser.add_argument("--sort", default="new", choices=["relevance", "hot", "top", "new", "comments"], help="Sort order")
-    parser.add_argument("--time-filter", default="all", choices=["hour", "day", "week", "month", "year", "all"], help="Time filter for searches")
-    parser.add_argument("--max-posts", type=int, default=50, help="Max posts per query/subreddit")
+    if crawl:
+        parser.add_argument("--sort", default="new", choices=["relevance", "hot", "top", "new", "comments"], help="Sort order")
+        parser.add_argument("--time-filter", default="all", choices=["hour", "day", "week", "month", "year", "all"], help="Time filter for searches")
+        parser.add_argument("--max-posts", type=int, default=50, help="Max posts per query/subreddit")
     parser.add_argument("--media-only", action="store_true", help="Require posts to include media")
     parser.add_argument("--download-media", action="store_true", help="Download media files when available")
+    parser.add_argument("--media-variant", default="source", choices=["source", "closest"], help="Pick the original media or the rendition closest to --media-width")
+    parser.add_argument("--media-width", type=int, default=None, help="Target width in pixels for --media-variant closest")
+    parser.add_argument("--max-media-bytes", type=int, default=None, help="Skip media downloads larger than this many bytes")
 
-    parser.add_argument("--storage-backend", default="local", choices=["local", "gcs"], help="Storage backend for cached files")
+    parser.add_argument("--storage-backend", default="local", choices=["local", "gcs", "tiered", "none"], help="Storage backend for cached files (tiered: GCS behind local write-behind staging)")
     parser.add_argument("--storage-path", default="cache", help="Local directory for cached data")
     parser.add_argument("--gcs-bucket", default=None, help="GCS bucket for storage backend")
     parser.add_argument("--gcs-prefix", default="social_crawler", help="Base prefix for GCS uploads")
+    parser.add_argument("--upload-workers", type=int, default=4, help="Background uploads for the tiered backend")
 
-    parser.add_argument("--ledger-mode", default="csv", choices=["csv", "sqlite"], help="Ledger persistence mode")
+    parser.add_argument("--rewrite-unchanged", action="store_true", help="Re-upload post JSON even when its fingerprint matches the ledger")
+    parser.add_argument("--fingerprint", default="payload", choices=["payload", "stable"], help="Hash the whole payload or only fields that change on edits")
+    parser.add_argument("--snapshots", action="store_true", help="Keep reverse-delta snapshots of post JSON when it changes")
+
+    parser.add_argument("--sink", default=None, help="Stream NDJSON records to '-' (stdout) or a file/named pipe as posts are fetched")
+    parser.add_argument("--sink-record", default="post", choices=["post", "ledger"], help="Emit the raw post payload or its ledger record")
+
+    parser.add_argument("--http2", action="store_true", help="Enable HTTP/2 multiplexing (requires httpx[http2])")
+    parser.add_argument("--max-connections", type=int, default=20, help="Total HTTP connection pool size")
+    parser.add_argument("--per-host-connections", type=int, default=6, help="Max concurrent requests per host")
+
+    parser.add_argument("--ledger-mode", default="csv", choices=["csv", "sqlite", "none"], help="Ledger persistence mode")
     parser.add_argument("--ledger-path", default="ledger.csv", help="Path for CSV ledger or sqlite DB")
 
+    if crawl:
+        parser.add_argument("--checkpoint-path", default=None, help="Write a run journal here so the crawl can be resumed")
+        parser.add_argument("--resume", action="store_true", help="Checkpoint the crawl and continue it from its run journal if one exists (default path: checkpoint-<query digest>.json)")
+
+    return parser
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    return _build_parser(description="Reddit scraping utility").parse_args(argv)
+
+
+def parse_ingest_args(argv: list[str]) -> argparse.Namespace:
+    # Dumps are read in full and not checkpointed, so listing and resume options don't apply;
+    # the HTTP pool options still shape --download-media.
+    parser = _build_parser(
+        crawl=False,
+        prog="social_crawler.cli ingest",
+        description="Ingest NDJSON (optionally .zst) Reddit submission dumps into the cache and ledger",
+    )
+    parser.add_argument("paths", nargs="+", help="Dump files to ingest, in order")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Records per parse/ledger batch")
     return parser.parse_args(argv)
 
 
 def build_config(ns: argparse.Namespace) -> ScraperConfig:
+    from .config import (
+        CheckpointConfig,
+        HttpConfig,
+        LedgerConfig,
+        MediaConfig,
+        QueryConfig,
+        ScraperConfig,
+        SinkConfig,
+        StorageConfig,
+    )
+
+    # Ingest namespaces have no listing or checkpoint options; their config defaults apply.
+    crawl = hasattr(ns, "sort")
+    listing = {"sort": ns.sort, "time_filter": ns.time_filter, "max_posts": ns.max_posts} if crawl else {}
     query_config = QueryConfig(
         queries=ns.query,
         subreddits=ns.subreddit,
-        sort=ns.sort,
-        time_filter=ns.time_filter,
-        max_posts=ns.max_posts,
         media_only=ns.media_only,
         download_media=ns.download_media,
+        **listing,
+    )
+
+    media_config = MediaConfig(
+        variant=ns.media_variant,
+        target_width=ns.media_width,
+        max_bytes=ns.max_media_bytes,
     )
 
     storage_config = StorageConfig(
@@ -46,6 +104,10 @@ def build_config(ns: argparse.Namespace) -> ScraperConfig:
         local_path=ns.storage_path,
         gcs_bucket=ns.gcs_bucket,
         gcs_prefix=ns.gcs_prefix,
+        skip_unchanged=not ns.rewrite_unchanged,
+        fingerprint=ns.fingerprint,
+        snapshots=ns.snapshots,
+        upload_workers=ns.upload_workers,
     )
 
     ledger_path = ns.ledger_path
@@ -55,12 +117,118 @@ def build_config(ns: argparse.Namespace) -> ScraperConfig:
         sqlite_path=ledger_path if ns.ledger_mode == "sqlite" else "ledger.db",
     )
 
-    return ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+    http_config = HttpConfig(
+        http2=ns.http2,
+        max_connections=ns.max_connections,
+        per_host_connections=ns.per_host_connections,
+    )
+
+    return ScraperConfig(
+        queries=query_config,
+        media=media_config,
+        storage=storage_config,
+        ledger=ledger_config,
+        http=http_config,
+        sink=SinkConfig(target=ns.sink, record=ns.sink_record),
+        checkpoint=CheckpointConfig(path=ns.checkpoint_path, resume=ns.resume) if crawl else CheckpointConfig(),
+    )
+
+
+def parse_manifest_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="social_crawler.cli manifest", description="Run many crawl jobs from a JSON manifest")
+    parser.add_argument("manifest", help="Path to the JSON job manifest")
+    parser.add_argument("--concurrency", type=int, default=None, help="Override the manifest's global concurrency cap")
+    return parser.parse_args(argv)
+
+
+def run_manifest(argv: list[str]) -> int:
+    args = parse_manifest_args(argv)
+
+    import json
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+
+    from .config import RedditCredentials
+    from .runner import ManifestRunner, load_manifest
+
+    load_dotenv()
+    manifest = load_manifest(Path(args.manifest))
+    if args.concurrency:
+        manifest.concurrency = args.concurrency
+    runner = ManifestRunner(RedditCredentials(), manifest)
+    try:
+        results = runner.run()
+    finally:
+        runner.close()
+    for result in results:
+        print(json.dumps(result.to_dict()))
+    return 1 if any(result.error for result in results) else 0
+
+
+def run_ingest(argv: list[str]) -> int:
+    args = parse_ingest_args(argv)
+
+    import json
+    from pathlib import Path
+
+    from .ingest import ingest_dumps
+    from .scraper import RedditScraper
+
+    scraper = RedditScraper(None, build_config(args))
+    try:
+        stats = ingest_dumps(scraper, [Path(path) for path in args.paths], workers=args.workers, batch_size=args.batch_size)
+    finally:
+        scraper.close()
+    print(json.dumps({**stats.to_dict(), **scraper.stats.to_dict()}), file=sys.stderr if args.sink == "-" else sys.stdout)
+    return 0
+
+
+def parse_report_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="social_crawler.cli report", description="Aggregate ledger statistics")
+    parser.add_argument("--ledger-mode", default="csv", choices=["csv", "sqlite"], help="Ledger persistence mode")
+    parser.add_argument("--ledger-path", default="ledger.csv", help="Path for CSV ledger or sqlite DB")
+    parser.add_argument("--format", default="json", choices=["json", "csv"], help="Report output format")
+    parser.add_argument("--output", default="-", help="Output file, or '-' for stdout")
+    parser.add_argument("--chunksize", type=int, default=250_000, help="Ledger rows read per chunk")
+    return parser.parse_args(argv)
+
+
+def run_report(argv: list[str]) -> int:
+    args = parse_report_args(argv)
+
+    from .config import LedgerConfig
+    from .report import build_report, write_report
+
+    ledger_config = LedgerConfig(
+        mode=args.ledger_mode,
+        csv_path=args.ledger_path if args.ledger_mode == "csv" else "ledger.csv",
+        sqlite_path=args.ledger_path if args.ledger_mode == "sqlite" else "ledger.db",
+    )
+    report = build_report(ledger_config, chunksize=args.chunksize)
+    if args.output == "-":
+        write_report(report, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as outfile:
+            write_report(report, outfile, args.format)
+    return 0
+
+
+COMMANDS = {"ingest": run_ingest, "manifest": run_manifest, "report": run_report}
 
 
 def main(argv: list[str] | None = None) -> int:
+    argv = argv or sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    args = parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    from .config import RedditCredentials
+    from .scraper import RedditScraper
+
     load_dotenv()
-    args = parse_args(argv or sys.argv[1:])
     creds = RedditCredentials()
     config = build_config(args)
     scraper = RedditScraper(creds, config)
@@ -43,23 +43,80 @@ class QueryConfig(BaseModel):
         return value
 
 
+class MediaConfig(BaseModel):
+    variant: str = Field("source")  # source or closest
+    target_width: Optional[int] = Field(None, ge=1)
+    max_bytes: Optional[int] = Field(None, ge=1)
+    partial_path: Optional[Path] = None  # defaults to <storage.local_path>/.partial
+    max_concurrent_downloads: int = Field(4, ge=1)  # per post, e.g. gallery items
+
+    @validator("variant")
+    def validate_variant(cls, value: str) -> str:
+        allowed = {"source", "closest"}
+        if value not in allowed:
+            raise ValueError(f"variant must be one of {allowed}")
+        return value
+
+
 class StorageConfig(BaseModel):
-    backend: str = Field("local")  # local or gcs
+    backend: str = Field("local")  # local, gcs, tiered (GCS behind local staging) or none
     local_path: Path = Field(Path("cache"))
     gcs_bucket: Optional[str] = None
     gcs_prefix: str = Field("social_crawler")
+    skip_unchanged: bool = Field(True)
+    fingerprint: str = Field("payload")  # payload or stable
+    snapshots: bool = Field(False)
+    upload_workers: int = Field(4, ge=1)  # background uploads for the tiered backend
+
+    @validator("fingerprint")
+    def validate_fingerprint(cls, value: str) -> str:
+        allowed = {"payload", "stable"}
+        if value not in allowed:
+            raise ValueError(f"fingerprint must be one of {allowed}")
+        return value
 
 
 class LedgerConfig(BaseModel):
-    mode: str = Field("csv")  # csv or sqlite
+    mode: str = Field("csv")  # csv, sqlite or none
     csv_path: Path = Field(Path("ledger.csv"))
     sqlite_path: Path = Field(Path("ledger.db"))
 
 
+class HttpConfig(BaseModel):
+    timeout: float = Field(20.0, gt=0)
+    max_connections: int = Field(20, ge=1)
+    max_keepalive_connections: int = Field(10, ge=0)
+    keepalive_expiry: float = Field(30.0, ge=0)
+    per_host_connections: Optional[int] = Field(6, ge=1)
+    http2: bool = Field(False)
+
+
+class SinkConfig(BaseModel):
+    target: Optional[str] = None  # "-" for stdout, or a file / named pipe path
+    record: str = Field("post")  # post or ledger
+
+    @validator("record")
+    def validate_record(cls, value: str) -> str:
+        allowed = {"post", "ledger"}
+        if value not in allowed:
+            raise ValueError(f"record must be one of {allowed}")
+        return value
+
+
+class CheckpointConfig(BaseModel):
+    path: Optional[Path] = None  # run journal; unset disables checkpointing unless resume is on
+    resume: bool = Field(False)  # without a path, uses checkpoint-<query config digest>.json
+    flush_interval: float = Field(5.0, ge=0)  # seconds between periodic journal writes
+
+
 class ScraperConfig(BaseModel):
     queries: QueryConfig = Field(default_factory=QueryConfig)
+    media: MediaConfig = Field(default_factory=MediaConfig)
     storage: StorageConfig = Field(default_factory=StorageConfig)
     ledger: LedgerConfig = Field(default_factory=LedgerConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+    sink: SinkConfig = Field(default_factory=SinkConfig)
+    checkpoint: CheckpointConfig = Field(default_factory=CheckpointConfig)
 
     def ensure_paths(self) -> None:
         if self.storage.backend == "local":
@@ -68,3 +125,49 @@ class ScraperConfig(BaseModel):
             self.ledger.csv_path.parent.mkdir(parents=True, exist_ok=True)
         if self.ledger.mode == "sqlite":
             self.ledger.sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+
+
+class JobSpec(BaseModel):
+    name: str
+    priority: int = Field(0)  # higher runs first
+    queries: QueryConfig = Field(default_factory=QueryConfig)
+    media: MediaConfig = Field(default_factory=MediaConfig)
+    ledger: Optional[LedgerConfig] = None  # defaults to ledger-<name>.csv
+    storage: Optional[StorageConfig] = None  # defaults to the manifest storage
+
+    @validator("ledger", always=True)
+    def default_ledger(cls, value: Optional[LedgerConfig], values: dict) -> LedgerConfig:
+        if value is not None:
+            return value
+        name = values.get("name", "job")
+        return LedgerConfig(csv_path=Path(f"ledger-{name}.csv"), sqlite_path=Path(f"ledger-{name}.db"))
+
+
+class ManifestConfig(BaseModel):
+    concurrency: int = Field(4, ge=1)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+    jobs: List[JobSpec] = Field(default_factory=list)
+
+    @validator("jobs")
+    def validate_ledgers(cls, jobs: List[JobSpec]) -> List[JobSpec]:
+        # Jobs run concurrently; two of them appending to one ledger would interleave rows.
+        owners = {}
+        for job in jobs:
+            ledger = job.ledger
+            if ledger.mode == "none":
+                continue
+            path = (ledger.sqlite_path if ledger.mode == "sqlite" else ledger.csv_path).resolve()
+            if path in owners:
+                raise ValueError(f"jobs {owners[path]!r} and {job.name!r} both write the ledger {path}")
+            owners[path] = job.name
+        return jobs
+
+    def job_config(self, job: JobSpec) -> ScraperConfig:
+        return ScraperConfig(
+            queries=job.queries,
+            media=job.media,
+            storage=job.storage or self.storage,
+            ledger=job.ledger,
+            http=self.http,
+        )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict
+
+# Fields Reddit updates on nearly every fetch (votes, comment counts, awards) and that
+# do not represent an edit to the post itself.
+VOLATILE_FIELDS = frozenset(
+    {
+        "all_awardings",
+        "awarders",
+        "downs",
+        "gilded",
+        "gildings",
+        "num_comments",
+        "num_crossposts",
+        "num_reports",
+        "score",
+        "top_awarded_type",
+        "total_awards_received",
+        "ups",
+        "upvote_ratio",
+        "view_count",
+        "wls",
+        "pwls",
+    }
+)
+
+
+def fingerprint_post(raw: Dict[str, Any], mode: str = "payload") -> str:
+    """Return a 128-bit hex digest of ``raw``; ``mode="stable"`` ignores volatile counters."""
+    if mode == "stable":
+        raw = {key: value for key, value in raw.items() if key not in VOLATILE_FIELDS}
+    elif mode != "payload":
+        raise ValueError(f"Unsupported fingerprint mode: {mode}")
+    encoded = json.dumps(raw, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def reverse_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe how to turn ``current`` back into ``previous`` using top-level keys only."""
+    changed = {key: value for key, value in previous.items() if current.get(key, object()) != value}
+    added = sorted(key for key in current if key not in previous)
+    return {"changed": changed, "added": added}
+
+
+__all__ = ["VOLATILE_FIELDS", "fingerprint_post", "reverse_delta"]
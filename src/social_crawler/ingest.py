@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .config import MediaConfig, QueryConfig
+from .reddit_client import RedditClient, RedditPost
+from .scraper import RedditScraper
+
+# Pushshift-style dumps are compressed with long-distance matching windows up to 2 GiB.
+ZSTD_MAX_WINDOW_SIZE = 2**31
+
+
+@dataclass
+class IngestStats:
+    lines: int = 0
+    malformed: int = 0
+    matched: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _load_zstandard() -> Any:
+    try:
+        import zstandard  # type: ignore
+    except ImportError:  # pragma: no cover
+        raise RuntimeError("zstandard is required to read .zst dumps (pip install zstandard)") from None
+    return zstandard
+
+
+def iter_dump_lines(path: Path) -> Iterator[str]:
+    """Stream lines from an NDJSON dump, decompressing ``.zst`` files on the fly."""
+    path = Path(path)
+    with path.open("rb") as raw:
+        if path.suffix == ".zst":
+            reader = _load_zstandard().ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW_SIZE).stream_reader(raw)
+            stream = io.TextIOWrapper(reader, encoding="utf-8", errors="replace")
+        else:
+            stream = io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+        for line in stream:
+            if line.strip():
+                yield line
+
+
+def _batched(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(lines)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_batch(lines: Sequence[str], queries: Dict[str, Any], media: Dict[str, Any]) -> tuple[List[RedditPost], int]:
+    """Parse and filter one batch of dump lines; runs inside worker processes.
+
+    Configs arrive as plain dicts so they pickle cheaply. Returns the kept posts and the
+    number of malformed lines.
+    """
+    query_config = QueryConfig(**queries)
+    media_config = MediaConfig(**media)
+    subreddits = {name.lower() for name in query_config.subreddits}
+    terms = [(query, query.lower()) for query in query_config.queries]
+    posts: List[RedditPost] = []
+    malformed = 0
+    for line in lines:
+        try:
+            data = json.loads(line)
+        except ValueError:
+            malformed += 1
+            continue
+        if not isinstance(data, dict):
+            malformed += 1
+            continue
+        if subreddits and str(data.get("subreddit", "")).lower() not in subreddits:
+            continue
+        matched: List[str] = []
+        if terms:
+            haystack = f"{data.get('title', '')}\n{data.get('selftext', '')}".lower()
+            matched = [query for query, term in terms if term in haystack]
+            if not matched:
+                continue
+        post = RedditClient._parse_post(data, media_config)
+        if query_config.media_only and not post.media_url:
+            continue
+        post.matched_queries = matched
+        posts.append(post)
+    return posts, malformed
+
+
+def ingest_dumps(
+    scraper: RedditScraper,
+    paths: Sequence[Path],
+    *,
+    workers: Optional[int] = None,
+    batch_size: int = 2000,
+    executor: Optional[Executor] = None,
+) -> IngestStats:
+    """Feed archive dumps through ``scraper``'s storage, ledger and sink in batches.
+
+    Lines are read lazily and at most ``2 * workers`` batches are in flight, so memory stays
+    bounded regardless of dump size. ``QueryConfig.queries`` are matched as case-insensitive
+    substrings of the title and selftext; sort and time filters do not apply offline.
+    """
+    stats = IngestStats()
+    queries = _model_dict(scraper.config.queries)
+    media = _model_dict(scraper.config.media)
+    workers = workers or os.cpu_count() or 1
+    owns_executor = executor is None
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    window = 2 * workers
+    pending: Deque[Future] = deque()
+
+    def drain_one() -> bool:
+        posts, malformed = pending.popleft().result()
+        stats.malformed += malformed
+        stats.matched += len(posts)
+        return scraper.process_batch(posts)
+
+    try:
+        for path in paths:
+            for batch in _batched(iter_dump_lines(path), batch_size):
+                stats.lines += len(batch)
+                pending.append(pool.submit(parse_batch, batch, queries, media))
+                if len(pending) >= window and not drain_one():
+                    return stats
+        while pending:
+            if not drain_one():
+                return stats
+    finally:
+        for future in pending:
+            future.cancel()
+        if owns_executor:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return stats
+
+
+def _model_dict(model: Any) -> Dict[str, Any]:
+    dump = getattr(model, "model_dump", None)
+    return dump() if dump else model.dict()
+
+
+__all__ = ["IngestStats", "ingest_dumps", "iter_dump_lines", "parse_batch"]
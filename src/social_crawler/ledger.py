@@ -1,12 +1,36 @@
 from __future__ import annotations
 
 import csv
-import sqlite3
+import json
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence
 
 from .config import LedgerConfig
+from .plugins import load_plugin
+
+FIELDNAMES = [
+    "post_id",
+    "created_utc",
+    "subreddit",
+    "author",
+    "title",
+    "permalink",
+    "url",
+    "media_url",
+    "cached_json_path",
+    "cached_media_path",
+    "media_status",
+    "matched_queries",
+    "fingerprint",
+    "cached_media_paths",
+]
+
+LEDGER_BACKENDS: Dict[str, str] = {
+    "csv": "social_crawler.ledger:CsvLedger",
+    "sqlite": "social_crawler.ledger_sqlite:SqliteLedger",
+}
 
 
 @dataclass
@@ -21,6 +45,10 @@ class LedgerEntry:
     media_url: Optional[str]
     cached_json_path: Optional[str]
     cached_media_path: Optional[str]
+    media_status: Optional[str] = None
+    matched_queries: Optional[List[str]] = None
+    fingerprint: Optional[str] = None
+    cached_media_paths: Optional[List[Optional[str]]] = None  # one per asset for multi-asset posts
 
     def to_dict(self) -> Dict[str, Optional[str]]:
         return {
@@ -34,106 +62,111 @@ class LedgerEntry:
             "media_url": self.media_url or "",
             "cached_json_path": self.cached_json_path or "",
             "cached_media_path": self.cached_media_path or "",
+            "media_status": self.media_status or "",
+            "matched_queries": json.dumps(self.matched_queries) if self.matched_queries else "",
+            "fingerprint": self.fingerprint or "",
+            "cached_media_paths": json.dumps(self.cached_media_paths) if self.cached_media_paths else "",
         }
 
 
-class Ledger:
-    FIELDNAMES = [
-        "post_id",
-        "created_utc",
-        "subreddit",
-        "author",
-        "title",
-        "permalink",
-        "url",
-        "media_url",
-        "cached_json_path",
-        "cached_media_path",
-    ]
-
+class LedgerBackend(ABC):
     def __init__(self, config: LedgerConfig) -> None:
         self.config = config
-        if config.mode == "csv":
-            self._init_csv()
-        elif config.mode == "sqlite":
-            self._init_sqlite()
-        else:
-            raise ValueError(f"Unsupported ledger mode: {config.mode}")
-
-    def _init_csv(self) -> None:
-        path = self.config.csv_path
+
+    @abstractmethod
+    def record(self, entry: LedgerEntry) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def fingerprint(self, post_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def record_many(self, entries: Sequence[LedgerEntry]) -> None:
+        for entry in entries:
+            self.record(entry)
+
+    def fingerprints(self, post_ids: Sequence[str]) -> Dict[str, str]:
+        found = {post_id: self.fingerprint(post_id) for post_id in post_ids}
+        return {post_id: value for post_id, value in found.items() if value}
+
+
+class CsvLedger(LedgerBackend):
+    def __init__(self, config: LedgerConfig) -> None:
+        super().__init__(config)
+        self._fingerprints: Optional[Dict[str, str]] = None
+        path = config.csv_path
         if not path.exists():
             path.parent.mkdir(parents=True, exist_ok=True)
             with path.open("w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=self.FIELDNAMES)
+                writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
                 writer.writeheader()
+            return
+        with path.open("r", newline="", encoding="utf-8") as csvfile:
+            header = next(csv.reader(csvfile), [])
+        if header != FIELDNAMES:
+            self._migrate(path)
 
-    def _init_sqlite(self) -> None:
-        path = self.config.sqlite_path
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with sqlite3.connect(path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS reddit_posts (
-                    post_id TEXT PRIMARY KEY,
-                    created_utc REAL,
-                    subreddit TEXT,
-                    author TEXT,
-                    title TEXT,
-                    permalink TEXT,
-                    url TEXT,
-                    media_url TEXT,
-                    cached_json_path TEXT,
-                    cached_media_path TEXT
-                )
-                """
-            )
-            conn.commit()
+    @staticmethod
+    def _migrate(path: Path) -> None:
+        """Rewrite a ledger written with an older column set using the current header."""
+        migrated = path.with_suffix(path.suffix + ".migrating")
+        with path.open("r", newline="", encoding="utf-8") as infile, migrated.open(
+            "w", newline="", encoding="utf-8"
+        ) as outfile:
+            reader = csv.DictReader(infile)
+            writer = csv.DictWriter(outfile, fieldnames=FIELDNAMES, extrasaction="ignore")
+            writer.writeheader()
+            for row in reader:
+                writer.writerow({name: row.get(name) or "" for name in FIELDNAMES})
+        migrated.replace(path)
 
     def record(self, entry: LedgerEntry) -> None:
-        if self.config.mode == "csv":
-            self._append_csv(entry)
-        else:
-            self._upsert_sqlite(entry)
+        self.record_many([entry])
 
-    def _append_csv(self, entry: LedgerEntry) -> None:
+    def record_many(self, entries: Sequence[LedgerEntry]) -> None:
         with self.config.csv_path.open("a", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=self.FIELDNAMES)
-            writer.writerow(entry.to_dict())
-
-    def _upsert_sqlite(self, entry: LedgerEntry) -> None:
-        with sqlite3.connect(self.config.sqlite_path) as conn:
-            conn.execute(
-                """
-                INSERT INTO reddit_posts (
-                    post_id, created_utc, subreddit, author, title,
-                    permalink, url, media_url, cached_json_path, cached_media_path
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(post_id) DO UPDATE SET
-                    created_utc=excluded.created_utc,
-                    subreddit=excluded.subreddit,
-                    author=excluded.author,
-                    title=excluded.title,
-                    permalink=excluded.permalink,
-                    url=excluded.url,
-                    media_url=excluded.media_url,
-                    cached_json_path=excluded.cached_json_path,
-                    cached_media_path=excluded.cached_media_path
-                """,
-                (
-                    entry.post_id,
-                    entry.created_utc,
-                    entry.subreddit,
-                    entry.author,
-                    entry.title,
-                    entry.permalink,
-                    entry.url,
-                    entry.media_url,
-                    entry.cached_json_path,
-                    entry.cached_media_path,
-                ),
-            )
-            conn.commit()
-
-
-__all__ = ["Ledger", "LedgerEntry"]
+            writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+            writer.writerows(entry.to_dict() for entry in entries)
+        if self._fingerprints is not None:
+            self._fingerprints.update((entry.post_id, entry.fingerprint) for entry in entries if entry.fingerprint)
+
+    def fingerprint(self, post_id: str) -> Optional[str]:
+        if self._fingerprints is None:
+            self._fingerprints = self._load_fingerprints()
+        return self._fingerprints.get(post_id)
+
+    def _load_fingerprints(self) -> Dict[str, str]:
+        fingerprints: Dict[str, str] = {}
+        with self.config.csv_path.open("r", newline="", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                if row.get("fingerprint"):
+                    fingerprints[row["post_id"]] = row["fingerprint"]
+        return fingerprints
+
+
+class Ledger:
+    FIELDNAMES = FIELDNAMES
+
+    def __init__(self, config: LedgerConfig) -> None:
+        self.config = config
+        backend_cls = load_plugin(LEDGER_BACKENDS, config.mode, "ledger mode")
+        self.backend: LedgerBackend = backend_cls(config)
+
+    def record(self, entry: LedgerEntry) -> None:
+        self.backend.record(entry)
+
+    def record_many(self, entries: Sequence[LedgerEntry]) -> None:
+        """Record a batch of entries in a single file append or transaction."""
+        if entries:
+            self.backend.record_many(entries)
+
+    def fingerprint(self, post_id: str) -> Optional[str]:
+        """Return the most recently recorded content fingerprint for ``post_id``."""
+        return self.backend.fingerprint(post_id)
+
+    def fingerprints(self, post_ids: Sequence[str]) -> Dict[str, str]:
+        """Bulk form of :meth:`fingerprint`; ids without a fingerprint are omitted."""
+        return self.backend.fingerprints(post_ids)
+
+
+__all__ = ["FIELDNAMES", "LEDGER_BACKENDS", "CsvLedger", "Ledger", "LedgerBackend", "LedgerEntry"]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Dict, Optional, Sequence, Tuple
+
+from .config import LedgerConfig
+from .ledger import FIELDNAMES, LedgerBackend, LedgerEntry
+
+# Stay below SQLite's default host parameter limit.
+_MAX_PARAMS = 900
+
+_UPSERT_SQL = """
+INSERT INTO reddit_posts (
+    post_id, created_utc, subreddit, author, title,
+    permalink, url, media_url, cached_json_path, cached_media_path,
+    media_status, matched_queries, fingerprint, cached_media_paths
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(post_id) DO UPDATE SET
+    created_utc=excluded.created_utc,
+    subreddit=excluded.subreddit,
+    author=excluded.author,
+    title=excluded.title,
+    permalink=excluded.permalink,
+    url=excluded.url,
+    media_url=excluded.media_url,
+    cached_json_path=excluded.cached_json_path,
+    cached_media_path=excluded.cached_media_path,
+    media_status=excluded.media_status,
+    matched_queries=excluded.matched_queries,
+    fingerprint=excluded.fingerprint,
+    cached_media_paths=excluded.cached_media_paths
+"""
+
+
+def _row(entry: LedgerEntry) -> Tuple:
+    return (
+        entry.post_id,
+        entry.created_utc,
+        entry.subreddit,
+        entry.author,
+        entry.title,
+        entry.permalink,
+        entry.url,
+        entry.media_url,
+        entry.cached_json_path,
+        entry.cached_media_path,
+        entry.media_status,
+        json.dumps(entry.matched_queries) if entry.matched_queries else None,
+        entry.fingerprint,
+        json.dumps(entry.cached_media_paths) if entry.cached_media_paths else None,
+    )
+
+
+class SqliteLedger(LedgerBackend):
+    def __init__(self, config: LedgerConfig) -> None:
+        super().__init__(config)
+        path = config.sqlite_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reddit_posts (
+                    post_id TEXT PRIMARY KEY,
+                    created_utc REAL,
+                    subreddit TEXT,
+                    author TEXT,
+                    title TEXT,
+                    permalink TEXT,
+                    url TEXT,
+                    media_url TEXT,
+                    cached_json_path TEXT,
+                    cached_media_path TEXT,
+                    media_status TEXT,
+                    matched_queries TEXT,
+                    fingerprint TEXT,
+                    cached_media_paths TEXT
+                )
+                """
+            )
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(reddit_posts)")}
+            for column in FIELDNAMES:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE reddit_posts ADD COLUMN {column} TEXT")
+            conn.commit()
+
+    def record(self, entry: LedgerEntry) -> None:
+        self.record_many([entry])
+
+    def record_many(self, entries: Sequence[LedgerEntry]) -> None:
+        with sqlite3.connect(self.config.sqlite_path) as conn:
+            conn.executemany(_UPSERT_SQL, [_row(entry) for entry in entries])
+            conn.commit()
+
+    def fingerprints(self, post_ids: Sequence[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        with sqlite3.connect(self.config.sqlite_path) as conn:
+            for start in range(0, len(post_ids), _MAX_PARAMS):
+                chunk = list(post_ids[start:start + _MAX_PARAMS])
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT post_id, fingerprint FROM reddit_posts WHERE post_id IN ({placeholders})",
+                    chunk,
+                )
+                found.update((post_id, value) for post_id, value in rows if value)
+        return found
+
+    def fingerprint(self, post_id: str) -> Optional[str]:
+        with sqlite3.connect(self.config.sqlite_path) as conn:
+            row = conn.execute("SELECT fingerprint FROM reddit_posts WHERE post_id = ?", (post_id,)).fetchone()
+        return row[0] if row and row[0] else None
+
+
+__all__ = ["SqliteLedger"]
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import json
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; only threads are coordinated
+    fcntl = None  # type: ignore[assignment]
+
+from .config import MediaConfig
+from .storage import StorageBackend
+
+CHUNK_SIZE = 1 << 16
+LOCK_STRIPES = 256
+# Shared by every downloader in the process, so jobs and threads writing the same storage
+# path take turns; flock on a file in the partial directory does the same across processes.
+_STRIPE_LOCKS = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+class MediaIntegrityError(RuntimeError):
+    """Raised when a finished download does not match the size the server advertised."""
+
+
+@dataclass
+class MediaDownload:
+    path: Optional[str]
+    status: str  # downloaded, cached, oversized, incomplete (a .part is kept) or failed
+    size: Optional[int] = None
+
+
+class MediaDownloader:
+    """Download media into storage, resuming interrupted transfers from local ``.part`` files.
+
+    Each committed file gets a ``<path>.meta.json`` sidecar recording its source URL and
+    size so truncated objects are detected and fetched again on the next run. A download
+    holds a lock on its ``.part`` file, shared by threads and by other processes using the
+    same partial directory, so concurrent fetches of one path wait and then find it cached.
+    """
+
+    def __init__(
+        self,
+        http: httpx.Client,
+        storage: StorageBackend,
+        config: Optional[MediaConfig] = None,
+        *,
+        partial_path: Optional[Path] = None,
+    ) -> None:
+        self.http = http
+        self.storage = storage
+        self.config = config or MediaConfig()
+        self.partial_path = partial_path or self.config.partial_path or Path(".partial")
+
+    @staticmethod
+    def meta_path(relative: str) -> str:
+        return f"{relative}.meta.json"
+
+    def part_path(self, relative: str) -> Path:
+        return self.partial_path / f"{relative}.part"
+
+    def fetch(self, url: str, relative: str, *, fallback_url: Optional[str] = None) -> MediaDownload:
+        """Download ``url`` to ``relative``; if the origin refuses it with a 4xx, use ``fallback_url``."""
+        try:
+            return self._fetch(url, relative)
+        except httpx.HTTPStatusError as exc:
+            if not fallback_url or fallback_url == url or not 400 <= exc.response.status_code < 500:
+                raise
+        return self._fetch(fallback_url, relative)
+
+    @contextmanager
+    def _locked(self, part: Path) -> Iterator[None]:
+        stripe = zlib.crc32(str(part.resolve()).encode("utf-8")) % LOCK_STRIPES
+        with _STRIPE_LOCKS[stripe]:
+            if fcntl is None:
+                yield
+                return
+            lock_path = self.partial_path / ".locks" / f"{stripe:02x}.lock"
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with lock_path.open("a") as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _fetch(self, url: str, relative: str) -> MediaDownload:
+        with self._locked(self.part_path(relative)):
+            try:
+                return self._fetch_locked(url, relative)
+            except FileNotFoundError:
+                # The .part vanished under us (e.g. a writer that does not honour the lock
+                # committed it); use the stored copy if it is complete, else download again.
+                return self._fetch_locked(url, relative)
+
+    def _fetch_locked(self, url: str, relative: str) -> MediaDownload:
+        cached = self._verify_cached(url, relative)
+        if cached is not None:
+            return cached
+        max_bytes = self.config.max_bytes
+        if max_bytes is not None:
+            size = self._probe_size(url)
+            if size is not None and size > max_bytes:
+                return MediaDownload(path=None, status="oversized", size=size)
+
+        part = self.part_path(relative)
+        part_meta = part.with_name(part.name + ".json")
+        part.parent.mkdir(parents=True, exist_ok=True)
+        state = self._load_part_state(part, part_meta, url)
+
+        total = self._download(url, part, part_meta, state)
+        if total is None:
+            return MediaDownload(path=None, status="oversized", size=part.stat().st_size if part.exists() else None)
+
+        size = part.stat().st_size
+        if size != total:
+            raise MediaIntegrityError(f"Downloaded {size} bytes for {url}, expected {total}; keeping partial file")
+        meta = {"url": url, "size": size}
+        self.storage.save_file(relative, part)
+        self.storage.save_json(self.meta_path(relative), meta)
+        part.unlink(missing_ok=True)
+        part_meta.unlink(missing_ok=True)
+        return MediaDownload(path=relative, status="downloaded", size=size)
+
+    def _verify_cached(self, url: str, relative: str) -> Optional[MediaDownload]:
+        # Size first: for files that were never cached this is the only storage round-trip.
+        stored = self.storage.size(relative)
+        if stored is None:
+            return None
+        meta = self.storage.load_json(self.meta_path(relative))
+        if meta is None:
+            # Files cached before integrity metadata existed are checked against the origin once.
+            expected = self._probe_size(url)
+            if expected is None or expected != stored:
+                return None
+            self.storage.save_json(self.meta_path(relative), {"url": url, "size": stored})
+            return MediaDownload(path=relative, status="cached", size=stored)
+        if meta.get("size") != stored:
+            return None
+        return MediaDownload(path=relative, status="cached", size=stored)
+
+    @staticmethod
+    def _load_part_state(part: Path, part_meta: Path, url: str) -> Dict[str, Optional[str]]:
+        if part.exists() and part_meta.exists():
+            state = json.loads(part_meta.read_text(encoding="utf-8"))
+            if state.get("url") == url and (state.get("etag") or state.get("last_modified")):
+                return state
+        part.unlink(missing_ok=True)
+        part_meta.unlink(missing_ok=True)
+        return {"url": url}
+
+    def _download(self, url: str, part: Path, part_meta: Path, state: Dict[str, Optional[str]]) -> Optional[int]:
+        """Stream ``url`` into ``part``; return the expected total size, or ``None`` if over the cap."""
+        offset = part.stat().st_size if part.exists() else 0
+        headers: Dict[str, str] = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = state.get("etag") or state.get("last_modified") or ""
+        with self.http.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            if response.status_code == 416 and offset:
+                total = _range_total(response.headers.get("content-range"))
+                if total == offset:
+                    return total
+                restart = True
+            else:
+                restart = False
+                total = self._write_body(response, part, part_meta, state, offset)
+        if restart:
+            # The origin changed size underneath us; start over from byte zero.
+            part.unlink(missing_ok=True)
+            part_meta.unlink(missing_ok=True)
+            state.clear()
+            state["url"] = url
+            return self._download(url, part, part_meta, state)
+        return total
+
+    def _write_body(
+        self,
+        response: httpx.Response,
+        part: Path,
+        part_meta: Path,
+        state: Dict[str, Optional[str]],
+        offset: int,
+    ) -> Optional[int]:
+        url = state.get("url")
+        max_bytes = self.config.max_bytes
+        response.raise_for_status()
+        if response.status_code == 206:
+            start, total = _parse_content_range(response.headers.get("content-range"))
+            if start != offset:
+                raise MediaIntegrityError(f"Server resumed {url} at byte {start}, expected {offset}")
+            mode = "ab"
+        else:
+            # Content-Length describes the encoded body, which iter_bytes() decodes.
+            encoded = response.headers.get("content-encoding", "identity") != "identity"
+            total = None if encoded else _content_length(response)
+            offset = 0
+            mode = "wb"
+        if max_bytes is not None and total is not None and total > max_bytes:
+            part.unlink(missing_ok=True)
+            part_meta.unlink(missing_ok=True)
+            return None
+        state["etag"] = response.headers.get("etag") or state.get("etag")
+        state["last_modified"] = response.headers.get("last-modified") or state.get("last_modified")
+        part_meta.write_text(json.dumps(state), encoding="utf-8")
+        written = offset
+        with part.open(mode) as outfile:
+            for chunk in response.iter_bytes(CHUNK_SIZE):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    break
+                outfile.write(chunk)
+        if max_bytes is not None and written > max_bytes:
+            part.unlink(missing_ok=True)
+            part_meta.unlink(missing_ok=True)
+            return None
+        return total if total is not None else written
+
+    def _probe_size(self, url: str) -> Optional[int]:
+        try:
+            response = self.http.head(url, follow_redirects=True)
+        except httpx.HTTPError:
+            return None
+        if response.status_code >= 400:
+            return None
+        return _content_length(response)
+
+
+def _content_length(response: httpx.Response) -> Optional[int]:
+    value = response.headers.get("content-length")
+    if value is None or not value.isdigit():
+        return None
+    return int(value)
+
+
+def _parse_content_range(value: Optional[str]) -> tuple[Optional[int], Optional[int]]:
+    # e.g. "bytes 100-199/200" or "bytes 100-199/*"
+    if not value or not value.startswith("bytes "):
+        return None, None
+    span, _, total = value[len("bytes "):].partition("/")
+    start = span.split("-", 1)[0]
+    return (
+        int(start) if start.isdigit() else None,
+        int(total) if total.isdigit() else None,
+    )
+
+
+def _range_total(value: Optional[str]) -> Optional[int]:
+    # 416 responses carry "bytes */<total>"
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+__all__ = ["MediaDownload", "MediaDownloader", "MediaIntegrityError"]
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any, Dict
+
+
+def load_plugin(registry: Dict[str, str], name: str, kind: str) -> Any:
+    """Import and return the ``"module:attribute"`` object registered under ``name``.
+
+    Backends are registered by import path so optional dependencies are only imported
+    when that backend is actually selected.
+    """
+    try:
+        target = registry[name]
+    except KeyError:
+        raise ValueError(f"Unsupported {kind}: {name}") from None
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+__all__ = ["load_plugin"]
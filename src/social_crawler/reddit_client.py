@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import copy
+import html
+import re
+import threading
 import time
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import httpx
 
-from .config import QueryConfig, RedditCredentials
+from .checkpoint import RunJournal
+from .config import MediaConfig, QueryConfig, RedditCredentials
+
+DASH_HEIGHTS = (240, 360, 480, 720, 1080)
+# Reddit returns at most this many posts per listing page; larger limits are paged with ``after``.
+PAGE_LIMIT = 100
+_DASH_PATTERN = re.compile(r"DASH_(\d+)")
 
 
 @dataclass
@@ -20,6 +30,25 @@ class RedditPost:
     created_utc: float
     media_url: Optional[str]
     raw: Dict
+    matched_queries: List[str] = field(default_factory=list)
+    media_urls: List[str] = field(default_factory=list)  # every asset, e.g. all gallery items
+    media_fallbacks: Dict[str, str] = field(default_factory=dict)  # guessed rendition url -> url Reddit reported
+    is_gallery: bool = False  # media_urls are gallery items, even if only one of them is valid
+
+
+def post_key(post_id: str) -> Union[int, str]:
+    """Compact set key for a post id; Reddit ids are base36 and fit in a small int."""
+    try:
+        return int(post_id, 36)
+    except ValueError:
+        return post_id
+
+
+@dataclass
+class _AccessToken:
+    value: Optional[str] = None
+    expiry: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
 
 
 class RedditClient:
@@ -30,46 +59,104 @@ class RedditClient:
         self,
         creds: RedditCredentials,
         session: Optional[httpx.Client] = None,
+        media: Optional[MediaConfig] = None,
     ) -> None:
         self.creds = creds
-        self._token: Optional[str] = None
-        self._token_expiry: float = 0.0
+        self.media = media or MediaConfig()
+        self._token = _AccessToken()
+        self._owns_session = session is None
         self._session = session or httpx.Client(timeout=20.0)
 
-    def _authenticate(self) -> None:
-        now = time.time()
-        if self._token and now < self._token_expiry - 30:
-            return
-        auth = (self.creds.client_id, self.creds.client_secret)
-        data = {
-            "grant_type": "password",
-            "username": self.creds.username,
-            "password": self.creds.password,
-        }
-        headers = {"User-Agent": self.creds.user_agent}
-        response = self._session.post(self.TOKEN_URL, data=data, auth=auth, headers=headers)
-        response.raise_for_status()
-        payload = response.json()
-        self._token = payload["access_token"]
-        self._token_expiry = now + payload.get("expires_in", 3600)
+    def with_media(self, media: MediaConfig) -> "RedditClient":
+        """Return a client applying ``media`` that shares this client's session and access token."""
+        clone = copy.copy(self)
+        clone.media = media
+        clone._owns_session = False
+        return clone
+
+    def _authenticate(self) -> str:
+        token = self._token
+        with token.lock:
+            now = time.time()
+            if token.value and now < token.expiry - 30:
+                return token.value
+            auth = (self.creds.client_id, self.creds.client_secret)
+            data = {
+                "grant_type": "password",
+                "username": self.creds.username,
+                "password": self.creds.password,
+            }
+            headers = {"User-Agent": self.creds.user_agent}
+            response = self._session.post(self.TOKEN_URL, data=data, auth=auth, headers=headers)
+            response.raise_for_status()
+            payload = response.json()
+            token.value = payload["access_token"]
+            token.expiry = now + payload.get("expires_in", 3600)
+            return token.value
 
     def _request(self, method: str, path: str, params: Optional[Dict] = None) -> Dict:
-        self._authenticate()
-        assert self._token
-        headers = {"Authorization": f"bearer {self._token}", "User-Agent": self.creds.user_agent}
+        access_token = self._authenticate()
+        headers = {"Authorization": f"bearer {access_token}", "User-Agent": self.creds.user_agent}
         url = f"{self.API_BASE}{path}"
         response = self._session.request(method, url, params=params, headers=headers)
         response.raise_for_status()
         return response.json()
 
-    def iter_posts(self, config: QueryConfig) -> Iterable[RedditPost]:
+    def iter_posts(self, config: QueryConfig, checkpoint: Optional[RunJournal] = None) -> Iterable[RedditPost]:
+        """Yield each post at most once per call.
+
+        Search results for a subreddit are merged across all queries before being yielded,
+        so a post matched by several queries comes out once with every query recorded in
+        ``matched_queries``.
+
+        With a ``checkpoint``, subreddits it marks complete are skipped, listings continue
+        from the recorded ``after`` cursor, and each subreddit is marked complete once the
+        consumer has taken all of its posts.
+        """
+        seen: Set[Union[int, str]] = set()
         if config.queries:
             for subreddit in config.subreddits or [None]:
+                task = self.task_name(subreddit)
+                if checkpoint is not None and checkpoint.is_complete(task):
+                    continue
+                merged: Dict[str, RedditPost] = {}
                 for query in config.queries:
-                    yield from self._search(subreddit=subreddit, query=query, config=config)
+                    for post in self._search(subreddit=subreddit, query=query, config=config):
+                        match = merged.get(post.id)
+                        if match is not None:
+                            if query not in match.matched_queries:
+                                match.matched_queries.append(query)
+                            continue
+                        if post_key(post.id) in seen:
+                            continue
+                        post.matched_queries.append(query)
+                        merged[post.id] = post
+                for post in merged.values():
+                    seen.add(post_key(post.id))
+                    yield post
+                if checkpoint is not None:
+                    checkpoint.complete(task)
         else:
             for subreddit in config.subreddits:
-                yield from self._listing(subreddit=subreddit, config=config)
+                task = self.task_name(subreddit)
+                if checkpoint is not None and checkpoint.is_complete(task):
+                    continue
+                after, fetched = checkpoint.cursor(task) if checkpoint is not None else (None, 0)
+                for page, after, fetched in self._listing(subreddit=subreddit, config=config, after=after, fetched=fetched):
+                    for post in page:
+                        key = post_key(post.id)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        yield post
+                    if checkpoint is not None and after:
+                        checkpoint.advance(task, after, fetched)
+                if checkpoint is not None:
+                    checkpoint.complete(task)
+
+    @staticmethod
+    def task_name(subreddit: Optional[str]) -> str:
+        return f"r/{subreddit}" if subreddit else "*"
 
     def _search(self, subreddit: Optional[str], query: str, config: QueryConfig) -> Iterable[RedditPost]:
         if subreddit:
@@ -80,51 +167,157 @@ class RedditClient:
             "q": query,
             "sort": config.sort,
             "t": config.time_filter,
-            "limit": config.max_posts,
             "restrict_sr": bool(subreddit),
             "include_over_18": True,
         }
-        payload = self._request("GET", path, params=params)
-        yield from self._parse_listing(payload)
+        for page, _, _ in self._paginate(path, params, config.max_posts):
+            yield from page
 
-    def _listing(self, subreddit: str, config: QueryConfig) -> Iterable[RedditPost]:
+    def _listing(
+        self,
+        subreddit: str,
+        config: QueryConfig,
+        after: Optional[str] = None,
+        fetched: int = 0,
+    ) -> Iterator[Tuple[List[RedditPost], Optional[str], int]]:
         path = f"/r/{subreddit}/{config.sort}"
-        params = {"limit": config.max_posts, "t": config.time_filter}
-        payload = self._request("GET", path, params=params)
-        yield from self._parse_listing(payload)
+        params = {"t": config.time_filter}
+        return self._paginate(path, params, config.max_posts, after=after, fetched=fetched)
+
+    def _paginate(
+        self,
+        path: str,
+        params: Dict,
+        limit: int,
+        *,
+        after: Optional[str] = None,
+        fetched: int = 0,
+    ) -> Iterator[Tuple[List[RedditPost], Optional[str], int]]:
+        """Yield ``(posts, after, fetched)`` per page until ``limit`` posts or the listing ends."""
+        while fetched < limit:
+            page_params = {**params, "limit": min(limit - fetched, PAGE_LIMIT)}
+            if after:
+                page_params["after"] = after
+            payload = self._request("GET", path, params=page_params)
+            page = list(self._parse_listing(payload))
+            after = payload.get("data", {}).get("after")
+            fetched += len(page)
+            yield page, after, fetched
+            if not after or not page:
+                return
 
     def _parse_listing(self, payload: Dict) -> Iterable[RedditPost]:
         for child in payload.get("data", {}).get("children", []):
-            data = child.get("data", {})
-            media_url = self._extract_media_url(data)
-            yield RedditPost(
-                id=data.get("id", ""),
-                title=data.get("title", ""),
-                subreddit=data.get("subreddit", ""),
-                author=data.get("author", ""),
-                permalink=f"https://www.reddit.com{data.get('permalink', '')}",
-                url=data.get("url_overridden_by_dest") or data.get("url", ""),
-                created_utc=float(data.get("created_utc", 0.0)),
-                media_url=media_url,
-                raw=data,
-            )
+            yield self._parse_post(child.get("data", {}), self.media)
+
+    @staticmethod
+    def _parse_post(data: Dict, media: Optional[MediaConfig] = None) -> RedditPost:
+        gallery = RedditClient._extract_gallery_urls(data, media or MediaConfig())
+        media_urls = gallery or RedditClient._extract_media_urls(data, media)
+        return RedditPost(
+            id=data.get("id", ""),
+            title=data.get("title", ""),
+            subreddit=data.get("subreddit", ""),
+            author=data.get("author", ""),
+            permalink=f"https://www.reddit.com{data.get('permalink', '')}",
+            url=data.get("url_overridden_by_dest") or data.get("url", ""),
+            created_utc=float(data.get("created_utc", 0.0)),
+            media_url=media_urls[0] if media_urls else None,
+            raw=data,
+            media_urls=media_urls,
+            media_fallbacks=RedditClient._media_fallbacks(data, media_urls),
+            is_gallery=bool(gallery),
+        )
+
+    @staticmethod
+    def _media_fallbacks(data: Dict, media_urls: List[str]) -> Dict[str, str]:
+        """Map downgraded ``DASH_*`` renditions, which may not exist, to the reported ``fallback_url``."""
+        reddit_video = (data.get("media") or {}).get("reddit_video") or {}
+        fallback_url = reddit_video.get("fallback_url")
+        if not data.get("is_video") or not fallback_url:
+            return {}
+        return {url: fallback_url for url in media_urls if url != fallback_url}
+
+    @staticmethod
+    def _extract_media_urls(data: Dict, media: Optional[MediaConfig] = None) -> List[str]:
+        gallery = RedditClient._extract_gallery_urls(data, media or MediaConfig())
+        if gallery:
+            return gallery
+        media_url = RedditClient._extract_media_url(data, media)
+        return [media_url] if media_url else []
+
+    @staticmethod
+    def _extract_gallery_urls(data: Dict, media: MediaConfig) -> List[str]:
+        metadata = data.get("media_metadata")
+        items = (data.get("gallery_data") or {}).get("items") or []
+        if not data.get("is_gallery") or not metadata:
+            return []
+        urls: List[str] = []
+        for item in items:
+            entry = metadata.get(item.get("media_id", ""))
+            if not entry or entry.get("status") != "valid":
+                continue
+            source = entry.get("s") or {}
+            # Animated items carry mp4/gif instead of a still image url.
+            url = source.get("mp4") or source.get("gif") or source.get("u")
+            if media.variant == "closest" and media.target_width and source.get("u"):
+                for preview in sorted(entry.get("p") or [], key=lambda candidate: candidate.get("x", 0)):
+                    if preview.get("x", 0) >= media.target_width and preview.get("u"):
+                        url = preview["u"]
+                        break
+            if url:
+                # Listing payloads HTML-escape these urls ("&amp;") unless raw_json=1 is requested.
+                urls.append(html.unescape(url))
+        return urls
 
     @staticmethod
-    def _extract_media_url(data: Dict) -> Optional[str]:
+    def _extract_media_url(data: Dict, media: Optional[MediaConfig] = None) -> Optional[str]:
+        media = media or MediaConfig()
         if data.get("is_video") and data.get("media"):
             reddit_video = data["media"].get("reddit_video")
             if reddit_video and reddit_video.get("fallback_url"):
-                return reddit_video["fallback_url"]
+                return RedditClient._select_video_rendition(reddit_video, media)
         preview = data.get("preview")
         if preview and "images" in preview and preview["images"]:
-            return preview["images"][0].get("source", {}).get("url")
+            return RedditClient._select_image_variant(preview["images"][0], media)
         url = data.get("url_overridden_by_dest")
         if url and any(url.lower().endswith(ext) for ext in (".jpg", ".jpeg", ".png", ".gif", ".mp4", ".mov")):
             return url
         return None
 
+    @staticmethod
+    def _select_image_variant(image: Dict, media: MediaConfig) -> Optional[str]:
+        source_url = image.get("source", {}).get("url")
+        if media.variant != "closest" or not media.target_width:
+            return source_url
+        resolutions = sorted(image.get("resolutions") or [], key=lambda item: item.get("width", 0))
+        for resolution in resolutions:
+            if resolution.get("width", 0) >= media.target_width and resolution.get("url"):
+                return resolution["url"]
+        return source_url
+
+    @staticmethod
+    def _select_video_rendition(reddit_video: Dict, media: MediaConfig) -> str:
+        fallback_url = reddit_video["fallback_url"]
+        if media.variant != "closest" or not media.target_width:
+            return fallback_url
+        match = _DASH_PATTERN.search(fallback_url)
+        width = reddit_video.get("width")
+        height = reddit_video.get("height") or (int(match.group(1)) if match else None)
+        if not match or not width or not height:
+            return fallback_url
+        # DASH renditions are keyed by height, so scale the target width by the source aspect ratio.
+        # The guessed rendition is not guaranteed to exist (newer uploads use e.g. 220/270), so
+        # downloads fall back to ``fallback_url`` when it is refused; see ``_media_fallbacks``.
+        wanted = height * media.target_width / width
+        for candidate in DASH_HEIGHTS:
+            if candidate >= wanted and candidate < int(match.group(1)):
+                return _DASH_PATTERN.sub(f"DASH_{candidate}", fallback_url, count=1)
+        return fallback_url
+
     def close(self) -> None:
-        self._session.close()
+        if self._owns_session:
+            self._session.close()
 
 
-__all__ = ["RedditClient", "RedditPost"]
+__all__ = ["RedditClient", "RedditPost", "post_key"]
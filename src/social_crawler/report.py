@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, TextIO
+
+import numpy as np
+import pandas as pd
+
+from .config import LedgerConfig
+
+REPORT_COLUMNS = ["post_id", "subreddit", "author", "created_utc", "media_url"]
+HOURS = list(range(24))
+# (subreddit, author) pairs pack a subreddit code into the high bits of an author hash.
+_AUTHOR_BITS = 40
+_AUTHOR_MASK = np.uint64((1 << _AUTHOR_BITS) - 1)
+_MAX_SUBREDDITS = 1 << (64 - _AUTHOR_BITS)
+
+
+def iter_ledger_chunks(config: LedgerConfig, chunksize: int = 250_000) -> Iterator[pd.DataFrame]:
+    """Yield the report columns of a CSV or SQLite ledger ``chunksize`` rows at a time."""
+    if config.mode == "csv":
+        yield from pd.read_csv(
+            config.csv_path,
+            usecols=REPORT_COLUMNS,
+            dtype={"post_id": str, "subreddit": str, "author": str, "media_url": str},
+            keep_default_na=False,
+            chunksize=chunksize,
+        )
+    elif config.mode == "sqlite":
+        with sqlite3.connect(config.sqlite_path) as conn:
+            query = f"SELECT {', '.join(REPORT_COLUMNS)} FROM reddit_posts"
+            yield from pd.read_sql_query(query, conn, chunksize=chunksize)
+    else:
+        raise ValueError(f"Unsupported ledger mode for reports: {config.mode}")
+
+
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values.fillna("").astype(str), index=False).to_numpy()
+
+
+class _HashSet:
+    """Distinct 64-bit hashes kept in sorted, disjoint levels, merged as they fill up like an LSM tree.
+
+    Levels shrink from first to last and a new level is merged into equal-or-smaller
+    neighbours, so there are at most log2(n) levels and each hash takes part in O(log n)
+    merges. Levels never overlap, so a merge is a concatenation of two sorted runs that a
+    stable sort joins in linear time. Memory is 8 bytes per distinct hash; a merge briefly
+    holds one more copy of the levels being merged.
+    """
+
+    def __init__(self) -> None:
+        self.levels: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def add(self, values: np.ndarray) -> np.ndarray:
+        """Add ``values`` and return a mask of the ones not seen before (first occurrence only)."""
+        # Probing in sorted order keeps searchsorted cache-friendly on large levels.
+        order = np.argsort(values, kind="stable")
+        ordered = values[order]
+        first = np.ones(len(ordered), dtype=bool)
+        first[1:] = ordered[1:] != ordered[:-1]
+        for level in self.levels:
+            positions = np.minimum(np.searchsorted(level, ordered), len(level) - 1)
+            first &= level[positions] != ordered
+        fresh = np.empty(len(values), dtype=bool)
+        fresh[order] = first
+        level = ordered[first]
+        while self.levels and len(self.levels[-1]) <= len(level):
+            level = np.concatenate((self.levels.pop(), level))
+            level.sort(kind="stable")  # in place: timsort merges the two runs with an n/2 buffer
+        if len(level):
+            self.levels.append(level)
+        return fresh
+
+
+@dataclass
+class LedgerReport:
+    """Incrementally aggregated ledger statistics.
+
+    Every aggregate is a vectorized group-by over one chunk that is folded into running
+    totals, so memory depends on the number of subreddits, distinct authors and distinct
+    posts rather than the number of ledger rows: 8 bytes per distinct post (when
+    deduplicating), per distinct (subreddit, author) pair and per distinct author.
+    Authors are 64-bit hashes; a pair is the subreddit's code in the top 24 bits and the
+    low 40 bits of the author hash.
+
+    CSV ledgers gain a row per post per run, so with ``dedupe_posts`` rows are deduplicated
+    on ``post_id``: each post counts once, with the values of the first row seen for it.
+    SQLite ledgers are keyed on ``post_id`` and skip this.
+    """
+
+    dedupe_posts: bool = True
+    rows: int = 0
+    posts: pd.Series = field(default_factory=lambda: pd.Series(dtype="int64"))
+    media_posts: pd.Series = field(default_factory=lambda: pd.Series(dtype="int64"))
+    hourly: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=HOURS, dtype="int64"))
+    _post_ids: _HashSet = field(default_factory=_HashSet)
+    _author_pairs: _HashSet = field(default_factory=_HashSet)
+    _authors: _HashSet = field(default_factory=_HashSet)
+    _subreddit_codes: Dict[str, int] = field(default_factory=dict)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if chunk.empty:
+            return
+        self.rows += len(chunk)
+        if self.dedupe_posts:
+            chunk = chunk[self._post_ids.add(_hash(chunk["post_id"]))]
+            if chunk.empty:
+                return
+        subreddit = chunk["subreddit"].fillna("").astype(str)
+        has_media = chunk["media_url"].fillna("").astype(str) != ""
+        created = pd.to_numeric(chunk["created_utc"], errors="coerce").fillna(0)
+        hour = ((created // 3600) % 24).astype("int64")
+
+        self.posts = self.posts.add(subreddit.value_counts(), fill_value=0).astype("int64")
+        self.media_posts = self.media_posts.add(subreddit[has_media].value_counts(), fill_value=0).astype("int64")
+        hourly = pd.crosstab(subreddit, hour).reindex(columns=HOURS, fill_value=0)
+        self.hourly = self.hourly.add(hourly, fill_value=0).astype("int64")
+
+        authors = _hash(chunk["author"])
+        pairs = (self._codes(subreddit) << np.uint64(_AUTHOR_BITS)) | (authors & _AUTHOR_MASK)
+        # An author seen for the first time overall is necessarily part of a new pair.
+        self._authors.add(authors[self._author_pairs.add(pairs)])
+
+    def _codes(self, subreddit: pd.Series) -> np.ndarray:
+        codes, names = pd.factorize(subreddit)
+        for name in names:
+            self._subreddit_codes.setdefault(name, len(self._subreddit_codes))
+        if len(self._subreddit_codes) > _MAX_SUBREDDITS:
+            raise ValueError(f"Reports support at most {_MAX_SUBREDDITS} distinct subreddits")
+        mapping = np.array([self._subreddit_codes[name] for name in names], dtype=np.uint64)
+        return mapping[codes]
+
+    def _authors_by_subreddit(self) -> pd.Series:
+        counts = np.zeros(len(self._subreddit_codes), dtype="int64")
+        for level in self._author_pairs.levels:
+            counts += np.bincount((level >> np.uint64(_AUTHOR_BITS)).astype("int64"), minlength=len(counts))
+        return pd.Series(counts, index=list(self._subreddit_codes), dtype="int64")
+
+    def summary(self) -> pd.DataFrame:
+        """One row per subreddit with volume, distinct authors, media ratio and hourly counts."""
+        frame = pd.DataFrame({"posts": self.posts})
+        frame["authors"] = self._authors_by_subreddit().reindex(frame.index, fill_value=0)
+        frame["media_posts"] = self.media_posts.reindex(frame.index, fill_value=0)
+        frame["media_ratio"] = (frame["media_posts"] / frame["posts"]).round(4)
+        hourly = self.hourly.reindex(frame.index, fill_value=0)
+        hourly.columns = [f"hour_{hour:02d}" for hour in HOURS]
+        frame = frame.join(hourly).fillna(0)
+        frame.index.name = "subreddit"
+        return frame.sort_values("posts", ascending=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        frame = self.summary()
+        hour_columns = [f"hour_{hour:02d}" for hour in HOURS]
+        total_posts = int(frame["posts"].sum()) if len(frame) else 0
+        total_media = int(frame["media_posts"].sum()) if len(frame) else 0
+        return {
+            "rows": self.rows,
+            "posts": total_posts,
+            "authors": len(self._authors),
+            "media_posts": total_media,
+            "media_ratio": round(total_media / total_posts, 4) if total_posts else 0.0,
+            "hourly": [int(value) for value in frame[hour_columns].sum().tolist()] if len(frame) else [0] * 24,
+            "subreddits": [
+                {
+                    "subreddit": name,
+                    "posts": int(row["posts"]),
+                    "authors": int(row["authors"]),
+                    "media_posts": int(row["media_posts"]),
+                    "media_ratio": float(row["media_ratio"]),
+                    "hourly": [int(row[column]) for column in hour_columns],
+                }
+                for name, row in frame.iterrows()
+            ],
+        }
+
+
+def build_report(config: LedgerConfig, *, chunksize: int = 250_000) -> LedgerReport:
+    # post_id is the primary key of the SQLite ledger, so only CSV ledgers repeat posts.
+    report = LedgerReport(dedupe_posts=config.mode != "sqlite")
+    for chunk in iter_ledger_chunks(config, chunksize=chunksize):
+        report.update(chunk)
+    return report
+
+
+def write_report(report: LedgerReport, output: TextIO, fmt: str = "json") -> None:
+    if fmt == "json":
+        json.dump(report.to_dict(), output, indent=2)
+        output.write("\n")
+    elif fmt == "csv":
+        report.summary().to_csv(output)
+    else:
+        raise ValueError(f"Unsupported report format: {fmt}")
+
+
+__all__ = ["LedgerReport", "build_report", "iter_ledger_chunks", "write_report"]
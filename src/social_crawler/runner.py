@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .config import JobSpec, ManifestConfig, RedditCredentials, StorageConfig
+from .reddit_client import RedditClient
+from .scraper import RedditScraper, RunStats
+from .storage import StorageBackend, build_storage_backend
+from .transport import HttpPool
+
+
+@dataclass
+class JobResult:
+    name: str
+    stats: Optional[RunStats]
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "stats": self.stats.to_dict() if self.stats else None, "error": self.error}
+
+
+def load_manifest(path: Path) -> ManifestConfig:
+    return ManifestConfig(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+class ManifestRunner:
+    """Run many crawl jobs in one process.
+
+    Jobs share a single HTTP pool, Reddit access token and storage backend instances;
+    each job keeps its own ledger, media policy and :class:`RunStats`.
+    """
+
+    def __init__(
+        self,
+        creds: RedditCredentials,
+        manifest: ManifestConfig,
+        *,
+        session: Optional[httpx.Client] = None,
+    ) -> None:
+        self.manifest = manifest
+        self.pool: Optional[HttpPool] = None if session is not None else HttpPool(manifest.http)
+        self.http = session or self.pool.client
+        self.client = RedditClient(creds, session=self.http)
+        self._storages: Dict[Tuple, StorageBackend] = {}
+        self._storage_lock = threading.Lock()
+
+    def run(self) -> List[JobResult]:
+        # ThreadPoolExecutor starts work in submission order, so sorting gives priority scheduling.
+        jobs = sorted(self.manifest.jobs, key=lambda job: -job.priority)
+        with ThreadPoolExecutor(max_workers=self.manifest.concurrency) as executor:
+            futures = [executor.submit(self._run_job, job) for job in jobs]
+            return [future.result() for future in futures]
+
+    def _run_job(self, job: JobSpec) -> JobResult:
+        config = self.manifest.job_config(job)
+        try:
+            scraper = RedditScraper(
+                self.client.creds,
+                config,
+                session=self.http,
+                client=self.client.with_media(config.media),
+                storage=self._storage_for(config.storage),
+            )
+            try:
+                stats = scraper.run()
+            finally:
+                scraper.close()
+        except Exception as exc:  # one failing job must not abort the rest of the manifest
+            return JobResult(name=job.name, stats=None, error=f"{type(exc).__name__}: {exc}")
+        return JobResult(name=job.name, stats=stats)
+
+    def _storage_for(self, config: StorageConfig) -> Optional[StorageBackend]:
+        if config.backend == "none":
+            return None
+        key = (config.backend, str(config.local_path), config.gcs_bucket, config.gcs_prefix)
+        with self._storage_lock:
+            if key not in self._storages:
+                self._storages[key] = build_storage_backend(
+                    config.backend,
+                    local_path=config.local_path,
+                    gcs_bucket=config.gcs_bucket,
+                    gcs_prefix=config.gcs_prefix,
+                    upload_workers=config.upload_workers,
+                )
+            return self._storages[key]
+
+    def close(self) -> None:
+        self.client.close()
+        for storage in self._storages.values():
+            storage.close()
+        if self.pool is not None:
+            self.pool.close()
+
+
+__all__ = ["JobResult", "ManifestRunner", "load_manifest"]
@@ -1,80 +1,307 @@
 from __future__ import annotations
 
 import mimetypes
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Mapping, Optional
 from urllib.parse import urlparse
 
 import httpx
 
+from .checkpoint import RunJournal, config_key, default_journal_path
 from .config import QueryConfig, RedditCredentials, ScraperConfig
+from .fingerprint import fingerprint_post, reverse_delta
 from .ledger import Ledger, LedgerEntry
+from .media import MediaDownload, MediaDownloader, MediaIntegrityError
 from .reddit_client import RedditClient, RedditPost
+from .sink import NdjsonSink
 from .storage import StorageBackend, build_storage_backend
+from .transport import HostStats, HttpPool
+
+
+@dataclass
+class RunStats:
+    posts_seen: int = 0
+    posts_recorded: int = 0
+    json_written: int = 0
+    json_unchanged: int = 0
+    media_downloaded: int = 0
+    media_cached: int = 0
+    media_oversized: int = 0
+    media_failed: int = 0  # incomplete or failed; retried on the next run
+    posts_emitted: int = 0
+    posts_resumed: int = 0  # already processed before an interrupted run stopped
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
 
 
 class RedditScraper:
+    """Crawl posts into storage and the ledger.
+
+    ``session``, ``client`` and ``storage`` may be shared with other scrapers (see
+    :mod:`social_crawler.runner`); ``close()`` only releases what this instance created.
+    Without credentials the scraper can still process posts from elsewhere through
+    :meth:`process_batch` (see :mod:`social_crawler.ingest`).
+    """
+
     def __init__(
         self,
-        creds: RedditCredentials,
+        creds: Optional[RedditCredentials],
         config: ScraperConfig,
         *,
         session: Optional[httpx.Client] = None,
+        client: Optional[RedditClient] = None,
+        storage: Optional[StorageBackend] = None,
     ) -> None:
         config.ensure_paths()
         self.config = config
-        self.client = RedditClient(creds, session=session)
-        self.storage: StorageBackend = build_storage_backend(
-            config.storage.backend,
-            local_path=config.storage.local_path,
-            gcs_bucket=config.storage.gcs_bucket,
-            gcs_prefix=config.storage.gcs_prefix,
-        )
-        self.ledger = Ledger(config.ledger)
-        self.http = session or httpx.Client(timeout=20.0)
-
-    def run(self) -> None:
-        for post in self.client.iter_posts(self.config.queries):
-            if self.config.queries.media_only and not post.media_url:
-                continue
-            json_path = self._cache_post_json(post)
-            media_path = None
-            if self.config.queries.download_media and post.media_url:
-                media_path = self._cache_media(post)
-            entry = LedgerEntry(
-                post_id=post.id,
-                created_utc=post.created_utc,
-                subreddit=post.subreddit,
-                author=post.author,
-                title=post.title,
-                permalink=post.permalink,
-                url=post.url,
-                media_url=post.media_url,
-                cached_json_path=json_path,
-                cached_media_path=media_path,
+        self.pool: Optional[HttpPool] = None if session is not None else HttpPool(config.http)
+        self.http = session or self.pool.client
+        self.client: Optional[RedditClient] = client
+        if client is None and creds is not None:
+            self.client = RedditClient(creds, session=self.http, media=config.media)
+        self.storage: Optional[StorageBackend] = storage
+        self._owns_storage = storage is None
+        if storage is None and config.storage.backend != "none":
+            self.storage = build_storage_backend(
+                config.storage.backend,
+                local_path=config.storage.local_path,
+                gcs_bucket=config.storage.gcs_bucket,
+                gcs_prefix=config.storage.gcs_prefix,
+                upload_workers=config.storage.upload_workers,
             )
+        self.ledger: Optional[Ledger] = Ledger(config.ledger) if config.ledger.mode != "none" else None
+        self.sink: Optional[NdjsonSink] = NdjsonSink.open(config.sink.target) if config.sink.target else None
+        self.stats = RunStats()
+        self.journal: Optional[RunJournal] = None
+
+    def run(self) -> RunStats:
+        if self.client is None:
+            raise RuntimeError("RedditScraper.run requires Reddit credentials or a client")
+        journal = self.journal = self._open_journal()
+        try:
+            if journal is not None:
+                self._resume_media(journal)
+            for post in self.client.iter_posts(self.config.queries, checkpoint=journal):
+                if journal is not None and journal.is_processed(post.id):
+                    self.stats.posts_resumed += 1
+                    continue
+                if not self._process(post):
+                    break
+                if journal is not None:
+                    journal.mark_processed(post.id)
+            else:
+                if journal is not None:
+                    journal.finish()
+        finally:
+            if journal is not None:
+                journal.flush()
+            self.journal = None
+        return self.stats
+
+    def _open_journal(self) -> Optional[RunJournal]:
+        checkpoint = self.config.checkpoint
+        if checkpoint.path is None and not checkpoint.resume:
+            return None
+        queries = self.config.queries
+        key = config_key(queries.model_dump() if hasattr(queries, "model_dump") else queries.dict())
+        path = checkpoint.path or default_journal_path(key)
+        return RunJournal.open(path, key, resume=checkpoint.resume, flush_interval=checkpoint.flush_interval)
+
+    def _resume_media(self, journal: RunJournal) -> None:
+        """Finish media downloads that were in flight when the previous run stopped."""
+        if self.storage is None:
+            return
+        downloader = self._media_downloader()
+        for relative, url in list(journal.media.items()):
+            self._count_media(self._fetch_media(downloader, url, relative))
+            # Dropped even if it failed again; the owning post is fetched again unless its
+            # subreddit completed.
+            journal.remove_media(relative)
+
+    def process_batch(self, posts: Iterable[RedditPost]) -> bool:
+        """Run already-fetched posts through the pipeline, recording the ledger in one batch.
+
+        Returns ``False`` when the sink's reader has gone away and feeding should stop.
+        """
+        posts = list(posts)
+        fingerprints = None
+        storage_config = self.config.storage
+        if self.storage is not None and self.ledger is not None and (storage_config.skip_unchanged or storage_config.snapshots):
+            fingerprints = self.ledger.fingerprints([post.id for post in posts])
+        prepared = []
+        for post in posts:
+            entry = self._prepare(post, fingerprints)
+            if entry is not None:
+                prepared.append((post, entry))
+        if self.ledger is not None:
+            self.ledger.record_many([entry for _, entry in prepared])
+        self.stats.posts_recorded += len(prepared)
+        return all(self._emit(post, entry) for post, entry in prepared)
+
+    def _process(self, post: RedditPost) -> bool:
+        """Cache, record and emit one post; return ``False`` when the crawl should stop."""
+        entry = self._prepare(post)
+        if entry is None:
+            return True
+        if self.ledger is not None:
             self.ledger.record(entry)
+        self.stats.posts_recorded += 1
+        return self._emit(post, entry)
 
-    def _cache_post_json(self, post: RedditPost) -> str:
-        relative = self._make_json_path(post)
-        self.storage.save_json(relative, post.raw)
-        return relative
+    def _prepare(self, post: RedditPost, fingerprints: Optional[Mapping[str, str]] = None) -> Optional[LedgerEntry]:
+        """Apply filters and cache the post's JSON and media; ``None`` means filtered out.
 
-    def _cache_media(self, post: RedditPost) -> Optional[str]:
-        if not post.media_url:
+        ``fingerprints`` holds previously recorded fingerprints looked up in bulk; without
+        it each post is looked up in the ledger individually.
+        """
+        self.stats.posts_seen += 1
+        if self.config.queries.media_only and not post.media_url:
             return None
-        relative = self._make_media_path(post)
-        if self.storage.exists(relative):
+        fingerprint = fingerprint_post(post.raw, self.config.storage.fingerprint)
+        json_path = None
+        downloads: List[MediaDownload] = []
+        if self.storage is not None:
+            json_path = self._cache_post_json(post, fingerprint, fingerprints)
+            if self.config.queries.download_media and post.media_url:
+                downloads = self._cache_media(post)
+        statuses = {download.status for download in downloads}
+        entry = LedgerEntry(
+            post_id=post.id,
+            created_utc=post.created_utc,
+            subreddit=post.subreddit,
+            author=post.author,
+            title=post.title,
+            permalink=post.permalink,
+            url=post.url,
+            media_url=post.media_url,
+            cached_json_path=json_path,
+            cached_media_path=next((download.path for download in downloads if download.path), None),
+            media_status=(statuses.pop() if len(statuses) == 1 else "mixed") if statuses else None,
+            cached_media_paths=[download.path for download in downloads] if post.is_gallery and downloads else None,
+            matched_queries=post.matched_queries or None,
+            fingerprint=fingerprint,
+        )
+        return entry
+
+    def _emit(self, post: RedditPost, entry: LedgerEntry) -> bool:
+        if self.sink is None:
+            return True
+        record = post.raw if self.config.sink.record == "post" else entry.to_dict()
+        if not self.sink.write(record):
+            return False
+        self.stats.posts_emitted += 1
+        return True
+
+    def _cache_post_json(
+        self,
+        post: RedditPost,
+        fingerprint: str,
+        fingerprints: Optional[Mapping[str, str]] = None,
+    ) -> str:
+        relative = self._make_json_path(post)
+        storage_config = self.config.storage
+        previous = None
+        if fingerprints is not None:
+            previous = fingerprints.get(post.id)
+        elif self.ledger is not None and (storage_config.skip_unchanged or storage_config.snapshots):
+            previous = self.ledger.fingerprint(post.id)
+        # The fingerprint only says what was written, so make sure this storage still has it
+        # (the file may be deleted, or the ledger shared with another storage location).
+        if storage_config.skip_unchanged and previous == fingerprint and self.storage.exists(relative):
+            self.stats.json_unchanged += 1
             return relative
-        response = self.http.get(post.media_url, follow_redirects=True)
-        response.raise_for_status()
-        self.storage.save_bytes(relative, response.content)
+        if storage_config.snapshots and previous is not None and previous != fingerprint:
+            self._snapshot_post_json(post, relative, previous)
+        self.storage.save_json(relative, post.raw)
+        self.stats.json_written += 1
         return relative
 
+    def _snapshot_post_json(self, post: RedditPost, relative: str, previous: str) -> None:
+        """Store a reverse delta of the cached JSON that ``post`` is about to replace."""
+        cached = self.storage.load_json(relative)
+        if cached is None:
+            return
+        snapshot = {"fingerprint": previous, "superseded_utc": time.time(), **reverse_delta(cached, post.raw)}
+        self.storage.save_json(self._make_snapshot_path(post, previous), snapshot)
+
+    def _cache_media(self, post: RedditPost) -> List[MediaDownload]:
+        """Fetch every media asset of ``post``; gallery items are downloaded concurrently.
+
+        Downloads run on worker threads but still go through the shared HTTP pool, so its
+        per-host connection limit applies across all of them.
+        """
+        urls = post.media_urls or ([post.media_url] if post.media_url else [])
+        if not urls:
+            return []
+        downloader = self._media_downloader()
+        if not post.is_gallery:
+            downloads = [self._fetch_media(downloader, urls[0], self._make_media_path(post), post.media_fallbacks.get(urls[0]))]
+        else:
+            paths = [self._make_gallery_path(post, url, index) for index, url in enumerate(urls, start=1)]
+            workers = min(self.config.media.max_concurrent_downloads, len(urls))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                downloads = list(
+                    executor.map(
+                        lambda url, path: self._fetch_media(downloader, url, path, post.media_fallbacks.get(url)),
+                        urls,
+                        paths,
+                    )
+                )
+        for download in downloads:
+            self._count_media(download)
+        return downloads
+
+    def _media_downloader(self) -> MediaDownloader:
+        return MediaDownloader(
+            self.http,
+            self.storage,
+            self.config.media,
+            partial_path=self.config.media.partial_path or self.config.storage.local_path / ".partial",
+        )
+
+    def _fetch_media(
+        self,
+        downloader: MediaDownloader,
+        url: str,
+        relative: str,
+        fallback_url: Optional[str] = None,
+    ) -> MediaDownload:
+        journal = self.journal
+        if journal is not None:
+            journal.add_media(relative, url)
+        try:
+            download = downloader.fetch(url, relative, fallback_url=fallback_url)
+        except (httpx.HTTPError, httpx.StreamError, MediaIntegrityError, OSError):
+            # One bad asset (or a local disk error) must not stop the crawl. Any .part file
+            # and journal entry stay so the next run resumes the transfer.
+            status = "incomplete" if downloader.part_path(relative).exists() else "failed"
+            return MediaDownload(path=None, status=status)
+        if journal is not None:
+            journal.remove_media(relative)
+        return download
+
+    def _count_media(self, download: MediaDownload) -> None:
+        if download.status == "downloaded":
+            self.stats.media_downloaded += 1
+        elif download.status == "cached":
+            self.stats.media_cached += 1
+        elif download.status == "oversized":
+            self.stats.media_oversized += 1
+        elif download.status in ("incomplete", "failed"):
+            self.stats.media_failed += 1
+
     @staticmethod
     def _make_json_path(post: RedditPost) -> str:
         return f"json/{post.subreddit}/{post.id}.json"
 
+    @staticmethod
+    def _make_snapshot_path(post: RedditPost, fingerprint: str) -> str:
+        return f"versions/{post.subreddit}/{post.id}/{fingerprint}.json"
+
     def _make_media_path(self, post: RedditPost) -> str:
         parsed = urlparse(post.media_url or "")
         extension = self._determine_extension(parsed.path, parsed.query)
@@ -82,6 +309,12 @@ class RedditScraper:
         safe_subreddit = post.subreddit.replace("/", "_")
         return f"media/{safe_subreddit}/{filename}"
 
+    def _make_gallery_path(self, post: RedditPost, url: str, index: int) -> str:
+        parsed = urlparse(url)
+        extension = self._determine_extension(parsed.path, parsed.query)
+        safe_subreddit = post.subreddit.replace("/", "_")
+        return f"media/{safe_subreddit}/{post.id}/{index}{extension}"
+
     def _determine_extension(self, path: str, query: str) -> str:
         guess = Path(path).suffix
         if guess:
@@ -97,9 +330,19 @@ class RedditScraper:
                 return ext
         return ".bin"
 
+    def connection_stats(self) -> Dict[str, HostStats]:
+        """Per-host request and connection counts for the shared pool (empty for injected sessions)."""
+        return self.pool.stats() if self.pool is not None else {}
+
     def close(self) -> None:
-        self.client.close()
-        self.http.close()
+        if self.client is not None:
+            self.client.close()
+        if self.sink is not None:
+            self.sink.close()
+        if self.storage is not None and self._owns_storage:
+            self.storage.close()
+        if self.pool is not None:
+            self.pool.close()
 
 
 def load_config(
@@ -115,4 +358,4 @@ def load_config(
     return RedditScraper(credentials, scraper_config)
 
 
-__all__ = ["RedditScraper", "load_config"]
+__all__ = ["RedditScraper", "RunStats", "load_config"]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import IO, Any, Dict
+
+
+class NdjsonSink:
+    """Write one JSON document per line and flush after every record.
+
+    Writes block while a downstream reader is slow (the OS pipe buffer is the queue), which
+    throttles the crawl instead of buffering unbounded output in memory.
+    """
+
+    def __init__(self, stream: IO[str], *, owns_stream: bool = False) -> None:
+        self._stream = stream
+        self._owns_stream = owns_stream
+        self.closed = False
+
+    @classmethod
+    def open(cls, target: str) -> "NdjsonSink":
+        if target == "-":
+            return cls(sys.stdout)
+        # Opening a named pipe blocks until a reader attaches, which is the behaviour we want.
+        return cls(open(target, "w", encoding="utf-8"), owns_stream=True)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Emit ``record``; return ``False`` once the reader has gone away."""
+        if self.closed:
+            return False
+        try:
+            self._stream.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+            self._stream.flush()
+        except BrokenPipeError:
+            self._detach()
+            return False
+        return True
+
+    def _detach(self) -> None:
+        self.closed = True
+        if self._stream is sys.stdout:
+            # Point stdout at devnull so the interpreter's final flush doesn't raise again.
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+
+    def close(self) -> None:
+        if self._owns_stream and not self._stream.closed:
+            try:
+                self._stream.close()
+            except BrokenPipeError:
+                pass
+        self.closed = True
+
+
+__all__ = ["NdjsonSink"]
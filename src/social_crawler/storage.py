@@ -1,17 +1,26 @@
 from __future__ import annotations
 
 import json
+import shutil
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional, Any
+from typing import Any, Dict, Optional
 
-try:
-    from google.cloud import storage as gcs  # type: ignore
-except ImportError:  # pragma: no cover
-    gcs = None
+from .plugins import load_plugin
+
+# Backends are imported on first use so e.g. google-cloud-storage is only loaded for GCS runs.
+STORAGE_BACKENDS: Dict[str, str] = {
+    "local": "social_crawler.storage:LocalStorage",
+    "gcs": "social_crawler.storage_gcs:GCSStorage",
+    "tiered": "social_crawler.storage_tiered:TieredStorage",
+}
 
 
 class StorageBackend(ABC):
+    @classmethod
+    def from_options(cls, **options: Any) -> "StorageBackend":
+        raise NotImplementedError
+
     @abstractmethod
     def save_json(self, path: str, data: dict) -> None:
         raise NotImplementedError
@@ -24,12 +33,30 @@ class StorageBackend(ABC):
     def exists(self, path: str) -> bool:
         raise NotImplementedError
 
+    @abstractmethod
+    def size(self, path: str) -> Optional[int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_json(self, path: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def save_file(self, path: str, source: Path) -> None:
+        self.save_bytes(path, source.read_bytes())
+
+    def close(self) -> None:
+        """Release resources; backends that buffer writes flush them here."""
+
 
 class LocalStorage(StorageBackend):
     def __init__(self, root: Path) -> None:
         self.root = root
         self.root.mkdir(parents=True, exist_ok=True)
 
+    @classmethod
+    def from_options(cls, *, local_path: Path, **_: Any) -> "LocalStorage":
+        return cls(local_path)
+
     def _resolve(self, path: str) -> Path:
         return self.root / path
 
@@ -43,44 +70,44 @@ class LocalStorage(StorageBackend):
         target.parent.mkdir(parents=True, exist_ok=True)
         target.write_bytes(payload)
 
+    def save_file(self, path: str, source: Path) -> None:
+        target = self._resolve(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+
     def exists(self, path: str) -> bool:
         return self._resolve(path).exists()
 
+    def size(self, path: str) -> Optional[int]:
+        target = self._resolve(path)
+        return target.stat().st_size if target.exists() else None
 
-class GCSStorage(StorageBackend):
-    def __init__(self, bucket_name: str, prefix: str = "social_crawler", client: Optional[Any] = None) -> None:
-        if not bucket_name:
-            raise ValueError("bucket_name is required for GCS storage")
-        if gcs is None:  # pragma: no cover
-            raise RuntimeError("google-cloud-storage is required for the GCS backend")
-        self.client = client or gcs.Client()
-        self.bucket = self.client.bucket(bucket_name)
-        self.prefix = prefix.rstrip("/")
-
-    def _blob_path(self, path: str) -> str:
-        if path.startswith("/"):
-            path = path[1:]
-        return f"{self.prefix}/{path}" if self.prefix else path
+    def load_json(self, path: str) -> Optional[dict]:
+        target = self._resolve(path)
+        if not target.exists():
+            return None
+        return json.loads(target.read_text(encoding="utf-8"))
 
-    def save_json(self, path: str, data: dict) -> None:
-        blob = self.bucket.blob(self._blob_path(path))
-        blob.upload_from_string(json.dumps(data), content_type="application/json")
 
-    def save_bytes(self, path: str, payload: bytes) -> None:
-        blob = self.bucket.blob(self._blob_path(path))
-        blob.upload_from_string(payload)
+def build_storage_backend(
+    backend: str,
+    *,
+    local_path: Path,
+    gcs_bucket: Optional[str],
+    gcs_prefix: str,
+    **options: Any,
+) -> StorageBackend:
+    backend_cls = load_plugin(STORAGE_BACKENDS, backend, "storage backend")
+    return backend_cls.from_options(local_path=local_path, gcs_bucket=gcs_bucket, gcs_prefix=gcs_prefix, **options)
 
-    def exists(self, path: str) -> bool:
-        blob = self.bucket.blob(self._blob_path(path))
-        return blob.exists()
 
+def __getattr__(name: str) -> Any:
+    # Keep ``from social_crawler.storage import GCSStorage`` working without an eager import.
+    if name == "GCSStorage":
+        from .storage_gcs import GCSStorage
 
-def build_storage_backend(backend: str, *, local_path: Path, gcs_bucket: Optional[str], gcs_prefix: str) -> StorageBackend:
-    if backend == "local":
-        return LocalStorage(local_path)
-    if backend == "gcs":
-        return GCSStorage(bucket_name=gcs_bucket or "", prefix=gcs_prefix)
-    raise ValueError(f"Unsupported storage backend: {backend}")
+        return GCSStorage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-__all__ = ["StorageBackend", "LocalStorage", "GCSStorage", "build_storage_backend"]
+__all__ = ["STORAGE_BACKENDS", "StorageBackend", "LocalStorage", "GCSStorage", "build_storage_backend"]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from .storage import StorageBackend
+
+
+def _load_gcs() -> Any:
+    try:
+        from google.cloud import storage as gcs  # type: ignore
+    except ImportError:  # pragma: no cover
+        raise RuntimeError("google-cloud-storage is required for the GCS backend") from None
+    return gcs
+
+
+class GCSStorage(StorageBackend):
+    def __init__(self, bucket_name: str, prefix: str = "social_crawler", client: Optional[Any] = None) -> None:
+        if not bucket_name:
+            raise ValueError("bucket_name is required for GCS storage")
+        self.client = client or _load_gcs().Client()
+        self.bucket = self.client.bucket(bucket_name)
+        self.prefix = prefix.rstrip("/")
+
+    @classmethod
+    def from_options(cls, *, gcs_bucket: Optional[str], gcs_prefix: str, **_: Any) -> "GCSStorage":
+        return cls(bucket_name=gcs_bucket or "", prefix=gcs_prefix)
+
+    def _blob_path(self, path: str) -> str:
+        if path.startswith("/"):
+            path = path[1:]
+        return f"{self.prefix}/{path}" if self.prefix else path
+
+    def save_json(self, path: str, data: dict) -> None:
+        blob = self.bucket.blob(self._blob_path(path))
+        blob.upload_from_string(json.dumps(data), content_type="application/json")
+
+    def save_bytes(self, path: str, payload: bytes) -> None:
+        blob = self.bucket.blob(self._blob_path(path))
+        blob.upload_from_string(payload)
+
+    def save_file(self, path: str, source: Path) -> None:
+        blob = self.bucket.blob(self._blob_path(path))
+        blob.upload_from_filename(str(source))
+
+    def exists(self, path: str) -> bool:
+        blob = self.bucket.blob(self._blob_path(path))
+        return blob.exists()
+
+    def size(self, path: str) -> Optional[int]:
+        blob = self.bucket.get_blob(self._blob_path(path))
+        return blob.size if blob is not None else None
+
+    def load_json(self, path: str) -> Optional[dict]:
+        blob = self.bucket.get_blob(self._blob_path(path))
+        if blob is None:
+            return None
+        return json.loads(blob.download_as_text())
+
+
+__all__ = ["GCSStorage"]
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .storage import StorageBackend
+
+JOURNAL_NAME = "journal.jsonl"
+
+
+class TieredStorage(StorageBackend):
+    """Write-behind storage: writes land in a local staging directory and upload in the background.
+
+    Every staged write is appended to ``<staging>/journal.jsonl`` before it is queued, and
+    a ``done`` record follows once the remote copy exists and the staged file has been
+    evicted. Writes still pending when the process dies are replayed on the next start.
+    Reads check the staging tier first and fall back to ``remote``. Uploads of one path
+    run one at a time, so a rewrite made mid-upload is uploaded after the older version.
+    """
+
+    def __init__(
+        self,
+        remote: StorageBackend,
+        staging_path: Path,
+        *,
+        workers: int = 4,
+        max_attempts: int = 5,
+        backoff: float = 0.5,
+    ) -> None:
+        self.remote = remote
+        self.staging_path = Path(staging_path)
+        self.files_path = self.staging_path / "files"
+        self.files_path.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.staging_path / JOURNAL_NAME
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[int, str]] = {}  # path -> (sequence, kind)
+        self._uploading: Set[str] = set()  # paths with an upload queued or running
+        self._seq = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tiered-upload")
+        self._replay()
+        self._journal = self.journal_path.open("a", encoding="utf-8")
+        with self._lock:
+            for path in list(self._pending):
+                self._submit(path)
+
+    @classmethod
+    def from_options(
+        cls,
+        *,
+        local_path: Path,
+        gcs_bucket: Optional[str],
+        gcs_prefix: str,
+        upload_workers: int = 4,
+        **_: Any,
+    ) -> "TieredStorage":
+        from .storage_gcs import GCSStorage
+
+        remote = GCSStorage(bucket_name=gcs_bucket or "", prefix=gcs_prefix)
+        return cls(remote, Path(local_path) / ".staging", workers=upload_workers)
+
+    def _staged(self, path: str) -> Path:
+        return self.files_path / path.lstrip("/")
+
+    def save_json(self, path: str, data: dict) -> None:
+        self._stage(path, "json", lambda tmp: tmp.write_text(json.dumps(data), encoding="utf-8"))
+
+    def save_bytes(self, path: str, payload: bytes) -> None:
+        self._stage(path, "bytes", lambda tmp: tmp.write_bytes(payload))
+
+    def save_file(self, path: str, source: Path) -> None:
+        self._stage(path, "file", lambda tmp: shutil.copyfile(source, tmp))
+
+    def exists(self, path: str) -> bool:
+        return self._staged(path).exists() or self.remote.exists(path)
+
+    def size(self, path: str) -> Optional[int]:
+        staged = self._staged(path)
+        try:
+            return staged.stat().st_size
+        except FileNotFoundError:
+            return self.remote.size(path)
+
+    def load_json(self, path: str) -> Optional[dict]:
+        try:
+            return json.loads(self._staged(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return self.remote.load_json(path)
+
+    def pending(self) -> int:
+        """Number of staged writes not yet uploaded."""
+        with self._lock:
+            return len(self._pending)
+
+    def _stage(self, path: str, kind: str, write: Any) -> None:
+        staged = self._staged(path)
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        tmp = staged.with_name(f"{staged.name}.{threading.get_ident()}.tmp")
+        write(tmp)
+        with self._lock:
+            # Replace under the lock so an uploader never evicts a newer version.
+            os.replace(tmp, staged)
+            self._seq += 1
+            seq = self._seq
+            self._pending[path] = (seq, kind)
+            self.failed.pop(path, None)
+            self._append({"op": "put", "seq": seq, "path": path, "kind": kind})
+            self._submit(path)
+
+    def _submit(self, path: str) -> None:
+        # Uploads are serialized per path: while one is queued or running, a newer write
+        # is picked up by that same upload once it finishes, so an older version can
+        # never land in the bucket after a newer one. Called with the lock held.
+        if path in self._uploading:
+            return
+        self._uploading.add(path)
+        self._executor.submit(self._upload, path)
+
+    def _upload(self, path: str) -> None:
+        staged = self._staged(path)
+        while True:
+            with self._lock:
+                if path not in self._pending:
+                    self._uploading.discard(path)
+                    return
+                seq, kind = self._pending[path]
+            error = self._put_remote(path, staged, kind)
+            with self._lock:
+                current = self._pending.get(path, (None,))[0]
+                if current != seq:
+                    continue  # rewritten while uploading; upload the newer staged file
+                if error is not None:
+                    # Keep the staged copy and its journal entry; retried on the next start.
+                    self.failed[path] = error
+                else:
+                    del self._pending[path]
+                    staged.unlink(missing_ok=True)
+                    self._append({"op": "done", "seq": seq, "path": path})
+                self._uploading.discard(path)
+                return
+
+    def _put_remote(self, path: str, staged: Path, kind: str) -> Optional[str]:
+        """Upload ``staged`` with retries; return an error description if every attempt failed."""
+        attempt = 0
+        while True:
+            try:
+                if kind == "json":
+                    self.remote.save_json(path, json.loads(staged.read_text(encoding="utf-8")))
+                else:
+                    self.remote.save_file(path, staged)
+                return None
+            except FileNotFoundError as exc:
+                return f"{type(exc).__name__}: {exc}"
+            except Exception as exc:  # SDK and network errors alike are retried
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    return f"{type(exc).__name__}: {exc}"
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal.flush()
+
+    def _replay(self) -> None:
+        if not self.journal_path.exists():
+            return
+        with self.journal_path.open("r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a torn final line from a crash mid-append
+                seq = int(record.get("seq", 0))
+                self._seq = max(self._seq, seq)
+                path = record.get("path")
+                if record.get("op") == "put":
+                    self._pending[path] = (seq, record.get("kind", "file"))
+                elif record.get("op") == "done" and self._pending.get(path, (None,))[0] == seq:
+                    del self._pending[path]
+        for path in [path for path in self._pending if not self._staged(path).exists()]:
+            del self._pending[path]
+        self._compact()
+
+    def _compact(self) -> None:
+        tmp = self.journal_path.with_name(JOURNAL_NAME + ".tmp")
+        with tmp.open("w", encoding="utf-8") as journal:
+            for path, (seq, kind) in sorted(self._pending.items(), key=lambda item: item[1][0]):
+                journal.write(json.dumps({"op": "put", "seq": seq, "path": path, "kind": kind}, separators=(",", ":")) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def close(self, drain: bool = True) -> None:
+        """Stop the uploader; with ``drain`` wait for queued uploads, otherwise leave them journaled."""
+        if self._journal.closed:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=not drain)
+        with self._lock:
+            self._journal.close()
+            self._compact()
+
+
+__all__ = ["TieredStorage"]
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import importlib.util
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+
+from .config import HttpConfig
+
+# httpcore trace events that mean a brand new connection was opened.
+_CONNECT_EVENTS = ("connection.connect_tcp.complete", "connection.connect_unix_socket.complete")
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    connections_opened: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class PooledTransport(httpx.BaseTransport):
+    """Wrap a transport with per-host concurrency limits and connection reuse accounting.
+
+    A host slot is held until the response body is closed, so streamed media downloads
+    count against the limit for as long as they are in flight.
+    """
+
+    def __init__(self, inner: httpx.BaseTransport, per_host_connections: Optional[int] = None) -> None:
+        self._inner = inner
+        self._per_host = per_host_connections
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, HostStats] = {}
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        slot = self._slot(host)
+        if slot is not None:
+            slot.acquire()
+        release = slot.release if slot is not None else (lambda: None)
+        with self._lock:
+            self._stats.setdefault(host, HostStats()).requests += 1
+        request.extensions = {**request.extensions, "trace": self._tracer(host, request.extensions.get("trace"))}
+        try:
+            response = self._inner.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        assert isinstance(response.stream, httpx.SyncByteStream)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def _slot(self, host: str) -> Optional[threading.BoundedSemaphore]:
+        if self._per_host is None:
+            return None
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self._per_host)
+            return slot
+
+    def _tracer(self, host: str, chained: Optional[Callable[..., Any]]) -> Callable[[str, Dict[str, Any]], None]:
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            if event in _CONNECT_EVENTS:
+                with self._lock:
+                    self._stats.setdefault(host, HostStats()).connections_opened += 1
+            if chained is not None:
+                chained(event, info)
+
+        return trace
+
+    def stats(self) -> Dict[str, HostStats]:
+        with self._lock:
+            return {host: HostStats(item.requests, item.connections_opened) for host, item in self._stats.items()}
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class HttpPool:
+    """One tuned ``httpx.Client`` shared by every component that talks HTTP."""
+
+    def __init__(self, config: Optional[HttpConfig] = None, *, transport: Optional[httpx.BaseTransport] = None) -> None:
+        self.config = config or HttpConfig()
+        self.transport = PooledTransport(
+            transport or self._default_transport(self.config),
+            per_host_connections=self.config.per_host_connections,
+        )
+        self.client = httpx.Client(transport=self.transport, timeout=self.config.timeout)
+
+    @staticmethod
+    def _default_transport(config: HttpConfig) -> httpx.HTTPTransport:
+        if config.http2 and importlib.util.find_spec("h2") is None:
+            raise RuntimeError("HTTP/2 support requires the h2 package (pip install 'httpx[http2]')")
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        return httpx.HTTPTransport(limits=limits, http2=config.http2)
+
+    def stats(self) -> Dict[str, HostStats]:
+        return self.transport.stats()
+
+    def close(self) -> None:
+        self.client.close()
+
+
+__all__ = ["HostStats", "HttpPool", "PooledTransport"]
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from social_crawler.checkpoint import RunJournal
+from social_crawler.config import (
+    CheckpointConfig,
+    LedgerConfig,
+    QueryConfig,
+    RedditCredentials,
+    ScraperConfig,
+    StorageConfig,
+)
+from social_crawler.scraper import RedditScraper
+
+TOKEN_PAYLOAD = {"access_token": "token", "expires_in": 3600}
+# Two pages of two posts per subreddit, chained with ``after`` cursors.
+PAGES = {
+    ("a", None): (["a1", "a2"], "t3_a2"),
+    ("a", "t3_a2"): (["a3", "a4"], None),
+    ("b", None): (["b1", "b2"], None),
+}
+
+
+def make_credentials() -> RedditCredentials:
+    return RedditCredentials(
+        client_id="id",
+        client_secret="secret",
+        username="user",
+        password="pass",
+        user_agent="social-crawler-tests",
+    )
+
+
+def make_session(requests: list[tuple[str, str | None]]) -> httpx.Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "www.reddit.com":
+            return httpx.Response(200, json=TOKEN_PAYLOAD)
+        subreddit = request.url.path.split("/")[2]
+        after = request.url.params.get("after")
+        requests.append((subreddit, after))
+        ids, next_after = PAGES[(subreddit, after)]
+        children = [{"data": {"id": post_id, "subreddit": subreddit, "title": post_id}} for post_id in ids]
+        return httpx.Response(200, json={"data": {"children": children, "after": next_after}})
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def make_config(tmp_path, *, resume: bool) -> ScraperConfig:
+    return ScraperConfig(
+        queries=QueryConfig(queries=[], subreddits=["a", "b"], max_posts=10),
+        storage=StorageConfig(backend="local", local_path=tmp_path / "cache"),
+        ledger=LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv"),
+        checkpoint=CheckpointConfig(path=tmp_path / "checkpoint.json", resume=resume, flush_interval=0),
+    )
+
+
+def test_scraper_resumes_interrupted_crawl_from_checkpoint(tmp_path, monkeypatch) -> None:
+    requests: list[tuple[str, str | None]] = []
+    scraper = RedditScraper(make_credentials(), make_config(tmp_path, resume=False), session=make_session(requests))
+    process = scraper._process
+
+    def crash_on_a4(post):
+        if post.id == "a4":
+            raise KeyboardInterrupt
+        return process(post)
+
+    monkeypatch.setattr(scraper, "_process", crash_on_a4)
+    with pytest.raises(KeyboardInterrupt):
+        scraper.run()
+    scraper.close()
+
+    state = json.loads((tmp_path / "checkpoint.json").read_text())
+    assert state["cursors"] == {"r/a": ["t3_a2", 2]}
+    assert state["processed"] == ["a1", "a2", "a3"]
+    assert state["finished"] is False
+
+    requests.clear()
+    resumed = RedditScraper(make_credentials(), make_config(tmp_path, resume=True), session=make_session(requests))
+    stats = resumed.run()
+    resumed.close()
+
+    assert requests == [("a", "t3_a2"), ("b", None)]
+    assert stats.posts_resumed == 1
+    assert stats.posts_recorded == 3
+    assert json.loads((tmp_path / "checkpoint.json").read_text())["finished"] is True
+
+
+def test_run_journal_ignores_finished_or_mismatched_journals(tmp_path) -> None:
+    path = tmp_path / "checkpoint.json"
+    journal = RunJournal.open(path, "key")
+    journal.complete("r/a")
+    journal.add_media("media/a/1.jpg", "https://i.redd.it/1.jpg")
+    journal.flush()
+
+    assert RunJournal.open(path, "key", resume=True).completed == ["r/a"]
+    assert RunJournal.open(path, "key", resume=True).media == {"media/a/1.jpg": "https://i.redd.it/1.jpg"}
+    assert RunJournal.open(path, "other", resume=True).completed == []
+
+    journal = RunJournal.open(path, "key", resume=True)
+    journal.finish()
+    assert RunJournal.open(path, "key", resume=True).completed == []
+
+
+def test_checkpoint_is_opt_in_and_resume_uses_a_per_config_journal(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    requests: list[tuple[str, str | None]] = []
+    config = make_config(tmp_path, resume=False)
+    config.checkpoint = CheckpointConfig()
+    scraper = RedditScraper(make_credentials(), config, session=make_session(requests))
+    scraper.run()
+    scraper.close()
+    assert list(tmp_path.glob("checkpoint*")) == []
+
+    config.checkpoint = CheckpointConfig(resume=True, flush_interval=0)
+    scraper = RedditScraper(make_credentials(), config, session=make_session(requests))
+    scraper.run()
+    scraper.close()
+    journals = list(tmp_path.glob("checkpoint*"))
+    assert len(journals) == 1 and journals[0].name.startswith("checkpoint-")
+    assert json.loads(journals[0].read_text())["finished"] is True
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from social_crawler.cli import build_config, parse_args, parse_ingest_args
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Budget for ``import social_crawler.cli`` plus argument parsing, on top of a bare interpreter.
+IMPORT_TIME_BUDGET_SECONDS = 0.15
+EXTRA_MODULE_BUDGET = 25
+HEAVY_MODULES = ("httpx", "pydantic", "pydantic_settings", "google.cloud.storage", "dotenv", "sqlite3")
+
+PROBE = """
+import json, sys, time
+baseline = len(sys.modules)
+start = time.perf_counter()
+import social_crawler.cli as cli
+cli.parse_args(["--query", "python"])
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "extra": len(sys.modules) - baseline, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_probe() -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout)
+
+
+def test_cli_import_stays_within_budget() -> None:
+    probe = run_probe()
+
+    assert not [name for name in HEAVY_MODULES if name in probe["modules"]]
+    assert probe["extra"] <= EXTRA_MODULE_BUDGET
+    assert probe["elapsed"] <= IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_build_config_maps_cli_flags() -> None:
+    ns = parse_args(["--subreddit", "python", "--ledger-mode", "sqlite", "--ledger-path", "data/ledger.db"])
+
+    config = build_config(ns)
+
+    assert config.queries.subreddits == ["python"]
+    assert config.ledger.mode == "sqlite"
+    assert config.ledger.sqlite_path == Path("data/ledger.db")
+
+
+@pytest.mark.parametrize("flag", ["--resume", "--checkpoint-path=j.json", "--max-posts=5", "--sort=top", "--time-filter=day"])
+def test_ingest_rejects_crawl_only_flags(flag, capsys) -> None:
+    with pytest.raises(SystemExit):
+        parse_ingest_args(["dump.ndjson", flag])
+    assert "unrecognized arguments" in capsys.readouterr().err
+
+
+def test_build_config_maps_ingest_flags() -> None:
+    ns = parse_ingest_args(["dump.ndjson", "--subreddit", "python", "--download-media", "--http2", "--batch-size", "10"])
+
+    config = build_config(ns)
+
+    assert config.queries.subreddits == ["python"] and config.queries.download_media
+    assert config.http.http2
+    assert config.checkpoint.path is None and not config.checkpoint.resume
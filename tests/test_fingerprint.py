@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from social_crawler.fingerprint import fingerprint_post, reverse_delta
+
+
+def test_fingerprint_stable_mode_ignores_volatile_fields() -> None:
+    original = {"id": "abc", "title": "Hello", "score": 1, "num_comments": 0}
+    voted = {**original, "score": 50, "num_comments": 3}
+    edited = {**original, "title": "Hello, edited"}
+
+    assert fingerprint_post(original) != fingerprint_post(voted)
+    assert fingerprint_post(original, "stable") == fingerprint_post(voted, "stable")
+    assert fingerprint_post(original, "stable") != fingerprint_post(edited, "stable")
+    assert len(fingerprint_post(original)) == 32
+
+
+def test_reverse_delta_restores_previous_top_level_keys() -> None:
+    previous = {"title": "Old", "selftext": "body", "flair": "x"}
+    current = {"title": "New", "selftext": "body", "edited": 1.0}
+
+    delta = reverse_delta(previous, current)
+    restored = {key: value for key, value in current.items() if key not in delta["added"]}
+    restored.update(delta["changed"])
+
+    assert restored == previous
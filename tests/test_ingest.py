@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from social_crawler.config import LedgerConfig, QueryConfig, ScraperConfig, StorageConfig
+from social_crawler.ingest import ingest_dumps, iter_dump_lines
+from social_crawler.scraper import RedditScraper
+
+
+def submission(post_id: str, subreddit: str, title: str, **extra) -> dict:
+    return {
+        "id": post_id,
+        "subreddit": subreddit,
+        "title": title,
+        "author": "archiver",
+        "permalink": f"/r/{subreddit}/comments/{post_id}/",
+        "created_utc": 1_400_000_000,
+        **extra,
+    }
+
+
+DUMP = [
+    submission("a1", "Python", "Async tips", url_overridden_by_dest="https://i.imgur.com/a1.png"),
+    submission("a2", "python", "Packaging woes"),
+    submission("a3", "rust", "Async in Rust", url_overridden_by_dest="https://i.imgur.com/a3.png"),
+    submission("a4", "python", "More ASYNC", url_overridden_by_dest="https://i.imgur.com/a4.jpg"),
+]
+
+
+def make_scraper(tmp_path, **query_options) -> RedditScraper:
+    config = ScraperConfig(
+        queries=QueryConfig(**query_options),
+        storage=StorageConfig(backend="local", local_path=tmp_path / "cache"),
+        ledger=LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv"),
+    )
+    return RedditScraper(None, config)
+
+
+def read_ledger(tmp_path) -> list[dict]:
+    with (tmp_path / "ledger.csv").open("r", encoding="utf-8") as infile:
+        return list(csv.DictReader(infile))
+
+
+def test_ingest_applies_query_filters_and_records_batches(tmp_path) -> None:
+    dump = tmp_path / "RS_2014-05.ndjson"
+    dump.write_text("\n".join(json.dumps(item) for item in DUMP) + "\nnot json\n", encoding="utf-8")
+    scraper = make_scraper(tmp_path, subreddits=["python"], queries=["async"], media_only=True)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stats = ingest_dumps(scraper, [dump], workers=2, batch_size=2, executor=executor)
+    scraper.close()
+
+    rows = read_ledger(tmp_path)
+    assert stats.lines == 5
+    assert stats.malformed == 1
+    assert [row["post_id"] for row in rows] == ["a1", "a4"]
+    assert rows[0]["media_url"] == "https://i.imgur.com/a1.png"
+    assert json.loads(rows[1]["matched_queries"]) == ["async"]
+    assert (tmp_path / "cache" / "json" / "python" / "a4.json").exists()
+
+
+def test_ingest_reads_zstd_dumps_with_process_pool(tmp_path) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    payload = "\n".join(json.dumps(item) for item in DUMP).encode("utf-8")
+    dump = tmp_path / "RS_2014-05.zst"
+    dump.write_bytes(zstandard.ZstdCompressor().compress(payload))
+    scraper = make_scraper(tmp_path)
+
+    assert len(list(iter_dump_lines(dump))) == len(DUMP)
+
+    stats = ingest_dumps(scraper, [dump], workers=2, batch_size=3)
+    scraper.close()
+
+    assert stats.matched == len(DUMP)
+    assert [row["post_id"] for row in read_ledger(tmp_path)] == ["a1", "a2", "a3", "a4"]
@@ -49,3 +49,59 @@ def test_ledger_sqlite_upserts_on_conflict(tmp_path) -> None:
         rows = conn.execute("SELECT post_id, title FROM reddit_posts").fetchall()
 
     assert rows == [("abc", "Updated")]
+
+
+def test_ledger_csv_migrates_older_header(tmp_path) -> None:
+    csv_path = tmp_path / "ledger.csv"
+    legacy_fields = [name for name in Ledger.FIELDNAMES if name != "media_status"]
+    with csv_path.open("w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=legacy_fields)
+        writer.writeheader()
+        writer.writerow({name: value for name, value in make_entry("old").to_dict().items() if name in legacy_fields})
+
+    ledger = Ledger(LedgerConfig(mode="csv", csv_path=csv_path))
+    ledger.record(make_entry("new"))
+
+    with csv_path.open("r", encoding="utf-8") as infile:
+        rows = list(csv.DictReader(infile))
+
+    assert [row["post_id"] for row in rows] == ["old", "new"]
+    assert rows[0]["media_status"] == ""
+
+
+def test_ledger_returns_latest_fingerprint(tmp_path) -> None:
+    for config in (
+        LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv"),
+        LedgerConfig(mode="sqlite", sqlite_path=tmp_path / "ledger.db"),
+    ):
+        ledger = Ledger(config)
+        first = make_entry("abc")
+        first.fingerprint = "one"
+        second = make_entry("abc")
+        second.fingerprint = "two"
+
+        assert ledger.fingerprint("abc") is None
+        ledger.record(first)
+        ledger.record(second)
+
+        assert ledger.fingerprint("abc") == "two"
+        assert Ledger(config).fingerprint("abc") == "two"
+        assert Ledger(config).fingerprints(["abc", "missing"]) == {"abc": "two"}
+
+
+def test_ledger_record_many_writes_batch(tmp_path) -> None:
+    for config in (
+        LedgerConfig(mode="csv", csv_path=tmp_path / "batch.csv"),
+        LedgerConfig(mode="sqlite", sqlite_path=tmp_path / "batch.db"),
+    ):
+        ledger = Ledger(config)
+        ledger.record_many([make_entry("abc"), make_entry("def"), make_entry("abc", title="Again")])
+        ledger.record_many([])
+
+        if config.mode == "csv":
+            with config.csv_path.open("r", encoding="utf-8") as infile:
+                assert [row["post_id"] for row in csv.DictReader(infile)] == ["abc", "def", "abc"]
+        else:
+            with sqlite3.connect(config.sqlite_path) as conn:
+                rows = conn.execute("SELECT post_id, title FROM reddit_posts ORDER BY post_id").fetchall()
+            assert rows == [("abc", "Again"), ("def", "Title")]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import httpx
 
-from social_crawler.config import QueryConfig, RedditCredentials
+from social_crawler.config import MediaConfig, QueryConfig, RedditCredentials
 from social_crawler.reddit_client import RedditClient
 
 
@@ -118,3 +118,108 @@ def test_iter_posts_listing_without_queries() -> None:
     assert posts[0].media_url == "https://vid.example.com/1.mp4"
     assert posts[1].media_url == "https://cdn.example.com/image.jpeg"
     client.close()
+
+
+def test_extract_media_url_closest_variant_prefers_smallest_sufficient_resolution() -> None:
+    data = {
+        "preview": {
+            "images": [
+                {
+                    "source": {"url": "https://images.example.com/full.png", "width": 3000},
+                    "resolutions": [
+                        {"url": "https://images.example.com/640.png", "width": 640},
+                        {"url": "https://images.example.com/108.png", "width": 108},
+                        {"url": "https://images.example.com/320.png", "width": 320},
+                    ],
+                }
+            ]
+        }
+    }
+
+    closest = MediaConfig(variant="closest", target_width=300)
+    too_wide = MediaConfig(variant="closest", target_width=4000)
+
+    assert RedditClient._extract_media_url(data, closest) == "https://images.example.com/320.png"
+    assert RedditClient._extract_media_url(data, too_wide) == "https://images.example.com/full.png"
+    assert RedditClient._extract_media_url(data) == "https://images.example.com/full.png"
+
+
+def test_extract_media_url_closest_variant_downgrades_dash_rendition() -> None:
+    data = {
+        "is_video": True,
+        "media": {
+            "reddit_video": {
+                "fallback_url": "https://v.redd.it/abc/DASH_1080.mp4?source=fallback",
+                "width": 1920,
+                "height": 1080,
+            }
+        },
+    }
+
+    media = MediaConfig(variant="closest", target_width=640)
+
+    assert RedditClient._extract_media_url(data, media) == "https://v.redd.it/abc/DASH_360.mp4?source=fallback"
+
+
+def test_extract_media_urls_returns_every_valid_gallery_item() -> None:
+    data = {
+        "is_gallery": True,
+        "gallery_data": {"items": [{"media_id": "b"}, {"media_id": "a"}, {"media_id": "gone"}, {"media_id": "c"}]},
+        "media_metadata": {
+            "a": {
+                "status": "valid",
+                "s": {"u": "https://preview.redd.it/a.jpg?width=2000&amp;s=1", "x": 2000},
+                "p": [
+                    {"u": "https://preview.redd.it/a.jpg?width=640&amp;s=2", "x": 640},
+                    {"u": "https://preview.redd.it/a.jpg?width=320&amp;s=3", "x": 320},
+                ],
+            },
+            "b": {"status": "valid", "s": {"gif": "https://i.redd.it/b.gif", "mp4": "https://preview.redd.it/b.gif?format=mp4"}},
+            "c": {"status": "failed"},
+        },
+    }
+
+    post = RedditClient._parse_post({"id": "g1", **data})
+    closest = RedditClient._extract_media_urls(data, MediaConfig(variant="closest", target_width=300))
+
+    assert post.media_urls == [
+        "https://preview.redd.it/b.gif?format=mp4",
+        "https://preview.redd.it/a.jpg?width=2000&s=1",
+    ]
+    assert post.media_url == post.media_urls[0]
+    assert post.is_gallery
+    assert not RedditClient._parse_post({"id": "p1", "url": "https://i.redd.it/p1.png"}).is_gallery
+    assert closest[1] == "https://preview.redd.it/a.jpg?width=320&s=3"
+
+
+def test_iter_posts_dedupes_across_queries_and_merges_matches() -> None:
+    def listing(*post_ids: str) -> dict:
+        return {
+            "data": {
+                "children": [
+                    {"data": {"id": post_id, "title": post_id, "subreddit": "python", "created_utc": 1.0}}
+                    for post_id in post_ids
+                ]
+            }
+        }
+
+    results = {"alpha": listing("aaa", "bbb"), "beta": listing("bbb", "ccc")}
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "www.reddit.com":
+            return httpx.Response(200, json=TOKEN_PAYLOAD)
+        query = request.url.params["q"]
+        requests.append(query)
+        return httpx.Response(200, json=results[query])
+
+    session = httpx.Client(transport=httpx.MockTransport(handler))
+    client = RedditClient(make_credentials(), session=session)
+    config = QueryConfig(queries=["alpha", "beta"], subreddits=["python", "python"], max_posts=10)
+
+    posts = list(client.iter_posts(config))
+
+    assert [post.id for post in posts] == ["aaa", "bbb", "ccc"]
+    assert [post.matched_queries for post in posts] == [["alpha"], ["alpha", "beta"], ["beta"]]
+    assert requests == ["alpha", "beta", "alpha", "beta"]
+    client.close()
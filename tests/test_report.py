@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pandas as pd
+
+from social_crawler.config import LedgerConfig
+from social_crawler.ledger import Ledger, LedgerEntry
+from social_crawler.report import build_report, write_report
+
+HOUR = 3600
+
+
+def make_entry(post_id: str, subreddit: str, author: str, hour: int, media: bool) -> LedgerEntry:
+    return LedgerEntry(
+        post_id=post_id,
+        created_utc=float(hour * HOUR + 5),
+        subreddit=subreddit,
+        author=author,
+        title=post_id,
+        permalink=f"https://reddit.com/{post_id}",
+        url=f"https://reddit.com/{post_id}",
+        media_url="https://i.redd.it/x.png" if media else None,
+        cached_json_path=None,
+        cached_media_path=None,
+    )
+
+
+ENTRIES = [
+    make_entry("a", "python", "alice", 1, True),
+    make_entry("b", "python", "bob", 1, False),
+    make_entry("c", "python", "alice", 25, True),
+    make_entry("d", "rust", "alice", 3, False),
+    make_entry("e", "python", "carol", 2, False),
+]
+
+
+def test_report_aggregates_csv_ledger_in_chunks(tmp_path) -> None:
+    config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    Ledger(config).record_many(ENTRIES)
+
+    report = build_report(config, chunksize=2).to_dict()
+
+    assert report["rows"] == 5
+    assert report["posts"] == 5
+    assert report["authors"] == 3
+    assert report["media_posts"] == 2
+    assert report["hourly"][1] == 3
+    python = report["subreddits"][0]
+    assert python["subreddit"] == "python"
+    assert (python["posts"], python["authors"], python["media_posts"]) == (4, 3, 2)
+    assert python["media_ratio"] == 0.5
+    assert python["hourly"][:4] == [0, 3, 1, 0]
+    assert report["subreddits"][1]["authors"] == 1
+
+
+def test_report_counts_posts_recorded_in_several_runs_once(tmp_path) -> None:
+    config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    ledger = Ledger(config)
+    ledger.record_many(ENTRIES)
+    # A second crawl appends the same posts again, plus one new one.
+    ledger.record_many(ENTRIES[:3] + [make_entry("f", "rust", "dave", 4, True)] + ENTRIES[3:])
+
+    report = build_report(config, chunksize=2).to_dict()
+
+    assert report["rows"] == 11
+    assert report["posts"] == 6
+    assert report["media_posts"] == 3
+    assert report["media_ratio"] == 0.5
+    assert report["hourly"][1] == 3
+    rust = report["subreddits"][1]
+    assert (rust["subreddit"], rust["posts"], rust["authors"], rust["media_posts"]) == ("rust", 2, 2, 1)
+    assert report["subreddits"][0]["posts"] == 4
+
+
+def test_report_reads_sqlite_and_writes_csv(tmp_path) -> None:
+    config = LedgerConfig(mode="sqlite", sqlite_path=tmp_path / "ledger.db")
+    Ledger(config).record_many(ENTRIES)
+    output = io.StringIO()
+
+    report = build_report(config, chunksize=3)
+    write_report(report, output, "csv")
+    output.seek(0)
+    frame = pd.read_csv(output, index_col="subreddit")
+
+    assert frame.loc["python", "posts"] == 4
+    assert frame.loc["rust", "hour_03"] == 1
+    assert list(frame.columns[:4]) == ["posts", "authors", "media_posts", "media_ratio"]
+    assert not report.dedupe_posts  # post_id is the primary key
+
+
+def test_report_json_output_is_serializable(tmp_path) -> None:
+    config = LedgerConfig(mode="csv", csv_path=tmp_path / "empty.csv")
+    Ledger(config)
+    output = io.StringIO()
+
+    write_report(build_report(config), output, "json")
+
+    assert json.loads(output.getvalue())["rows"] == 0
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from social_crawler.config import (
+    JobSpec,
+    LedgerConfig,
+    ManifestConfig,
+    MediaConfig,
+    QueryConfig,
+    RedditCredentials,
+    StorageConfig,
+)
+from social_crawler.runner import ManifestRunner, load_manifest
+
+
+def make_credentials() -> RedditCredentials:
+    return RedditCredentials(
+        client_id="id",
+        client_secret="secret",
+        username="user",
+        password="pass",
+        user_agent="social-crawler-tests",
+    )
+
+
+def listing(subreddit: str, post_id: str) -> dict:
+    return {
+        "data": {
+            "children": [
+                {
+                    "data": {
+                        "id": post_id,
+                        "title": post_id,
+                        "subreddit": subreddit,
+                        "created_utc": 1.0,
+                        "preview": {
+                            "images": [
+                                {
+                                    "source": {"url": f"https://i.redd.it/{post_id}-full.png", "width": 2000},
+                                    "resolutions": [{"url": f"https://i.redd.it/{post_id}-320.png", "width": 320}],
+                                }
+                            ]
+                        },
+                    }
+                }
+            ]
+        }
+    }
+
+
+def read_rows(path) -> list[dict]:
+    with path.open("r", encoding="utf-8") as infile:
+        return list(csv.DictReader(infile))
+
+
+def test_manifest_runner_shares_token_and_keeps_job_ledgers(tmp_path) -> None:
+    token_requests: list[str] = []
+    listing_paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "www.reddit.com":
+            token_requests.append(request.url.path)
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        listing_paths.append(request.url.path)
+        subreddit = request.url.path.split("/")[2]
+        return httpx.Response(200, json=listing(subreddit, f"{subreddit}1"))
+
+    manifest = ManifestConfig(
+        concurrency=1,
+        storage=StorageConfig(backend="local", local_path=tmp_path / "cache"),
+        jobs=[
+            JobSpec(
+                name="low",
+                priority=1,
+                queries=QueryConfig(subreddits=["python"]),
+                ledger=LedgerConfig(mode="csv", csv_path=tmp_path / "low.csv"),
+            ),
+            JobSpec(
+                name="high",
+                priority=10,
+                queries=QueryConfig(subreddits=["rust"]),
+                media=MediaConfig(variant="closest", target_width=300),
+                ledger=LedgerConfig(mode="csv", csv_path=tmp_path / "high.csv"),
+            ),
+        ],
+    )
+    runner = ManifestRunner(make_credentials(), manifest, session=httpx.Client(transport=httpx.MockTransport(handler)))
+
+    results = runner.run()
+    runner.close()
+
+    assert [result.name for result in results] == ["high", "low"]
+    assert all(result.error is None for result in results)
+    assert [result.stats.posts_recorded for result in results] == [1, 1]
+    assert token_requests == ["/api/v1/access_token"]
+    assert listing_paths == ["/r/rust/new", "/r/python/new"]
+    assert read_rows(tmp_path / "high.csv")[0]["media_url"] == "https://i.redd.it/rust1-320.png"
+    assert read_rows(tmp_path / "low.csv")[0]["media_url"] == "https://i.redd.it/python1-full.png"
+    assert len(runner._storages) == 1
+
+
+def test_manifest_runner_reports_failed_jobs_without_stopping(tmp_path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "www.reddit.com":
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        if "/r/broken/" in request.url.path:
+            return httpx.Response(500)
+        return httpx.Response(200, json=listing("python", "ok1"))
+
+    manifest_path = tmp_path / "jobs.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "concurrency": 2,
+                "storage": {"backend": "local", "local_path": str(tmp_path / "cache")},
+                "jobs": [
+                    {"name": "broken", "queries": {"subreddits": ["broken"]}, "ledger": {"csv_path": str(tmp_path / "a.csv")}},
+                    {"name": "ok", "queries": {"subreddits": ["python"]}, "ledger": {"csv_path": str(tmp_path / "b.csv")}},
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    runner = ManifestRunner(
+        make_credentials(),
+        load_manifest(manifest_path),
+        session=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+
+    results = {result.name: result for result in runner.run()}
+    runner.close()
+
+    assert results["broken"].error and results["broken"].error.startswith("HTTPStatusError")
+    assert results["ok"].stats.posts_recorded == 1
+
+
+def test_manifest_runner_jobs_overlapping_on_media_share_one_download(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)  # default ledgers are relative to the working directory
+    media_requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "www.reddit.com":
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        if request.url.host == "i.redd.it":
+            media_requests.append(request.url.path)
+            return httpx.Response(200, content=b"image-bytes")
+        return httpx.Response(200, json=listing("pics", "p1"))
+
+    manifest = ManifestConfig(
+        concurrency=2,
+        storage=StorageConfig(backend="local", local_path=tmp_path / "cache"),
+        jobs=[
+            JobSpec(name="new", queries=QueryConfig(subreddits=["pics"], sort="new", download_media=True)),
+            JobSpec(name="top", queries=QueryConfig(subreddits=["pics"], sort="top", download_media=True)),
+        ],
+    )
+    runner = ManifestRunner(make_credentials(), manifest, session=httpx.Client(transport=httpx.MockTransport(handler)))
+
+    results = runner.run()
+    runner.close()
+
+    assert all(result.error is None for result in results)
+    assert sorted(result.stats.media_downloaded + result.stats.media_cached for result in results) == [1, 1]
+    assert len(media_requests) == 1
+    assert (tmp_path / "cache" / "media" / "pics" / "p1.png").read_bytes() == b"image-bytes"
+    assert len(read_rows(tmp_path / "ledger-new.csv")) == len(read_rows(tmp_path / "ledger-top.csv")) == 1
+
+
+def test_manifest_rejects_jobs_sharing_a_ledger(tmp_path) -> None:
+    shared = LedgerConfig(mode="sqlite", sqlite_path=tmp_path / "ledger.db")
+    with pytest.raises(ValueError, match="both write the ledger"):
+        ManifestConfig(jobs=[JobSpec(name="a", ledger=shared), JobSpec(name="b", ledger=shared)])
+
+    assert JobSpec(name="tech").ledger.csv_path == Path("ledger-tech.csv")
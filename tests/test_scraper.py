@@ -1,20 +1,33 @@
 from __future__ import annotations
 
 import csv
+import json
+import threading
+import time
 from dataclasses import dataclass
 
 import httpx
 
-from social_crawler.config import LedgerConfig, QueryConfig, RedditCredentials, ScraperConfig, StorageConfig
-from social_crawler.reddit_client import RedditPost
+from social_crawler.config import (
+    LedgerConfig,
+    MediaConfig,
+    QueryConfig,
+    RedditCredentials,
+    ScraperConfig,
+    SinkConfig,
+    StorageConfig,
+)
+from social_crawler.media import MediaDownloader
+from social_crawler.reddit_client import RedditClient, RedditPost
 from social_crawler.scraper import RedditScraper
+from social_crawler.storage import LocalStorage
 
 
 @dataclass
 class DummyClient:
     posts: list[RedditPost]
 
-    def iter_posts(self, config: QueryConfig):  # noqa: D401 - test double
+    def iter_posts(self, config: QueryConfig, checkpoint=None):  # noqa: D401 - test double
         return iter(self.posts)
 
     def close(self) -> None:  # pragma: no cover - tests don't rely on it
@@ -25,11 +38,21 @@ class DummyResponse:
     def __init__(self, content: bytes) -> None:
         self.content = content
         self.status_code = 200
+        self.headers = {"content-length": str(len(content))}
 
     def raise_for_status(self) -> None:
         if self.status_code >= 400:
             raise httpx.HTTPStatusError("error", request=None, response=None)
 
+    def iter_bytes(self, chunk_size: int | None = None):
+        yield self.content
+
+    def __enter__(self) -> "DummyResponse":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
 
 class DummyHTTP:
     def __init__(self, payload: bytes) -> None:
@@ -40,6 +63,10 @@ class DummyHTTP:
         self.calls.append(url)
         return DummyResponse(self.payload)
 
+    def stream(self, method: str, url: str, headers=None, follow_redirects: bool = True) -> DummyResponse:
+        self.calls.append(url)
+        return DummyResponse(self.payload)
+
     def close(self) -> None:  # pragma: no cover
         pass
 
@@ -114,3 +141,355 @@ def test_scraper_downloads_media_when_requested(tmp_path) -> None:
     assert scraper.http.calls == ["https://cdn.example.com/file.mp4"]
 
     scraper.close()
+
+
+def test_scraper_downloads_gallery_items_and_records_paths(tmp_path) -> None:
+    query_config = QueryConfig(queries=[], subreddits=["python"], media_only=False, download_media=True)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+    urls = [f"https://i.redd.it/item{index}.jpg" for index in range(3)]
+    post = make_post("gallery", urls[0])
+    post.media_urls = urls
+    post.is_gallery = True
+
+    scraper = RedditScraper(None, config, session=httpx.Client(), client=DummyClient([post]))
+    scraper.http = DummyHTTP(b"bytes")
+    scraper.run()
+
+    gallery_dir = tmp_path / "cache" / "media" / "python" / "gallery"
+    assert sorted(path.name for path in gallery_dir.glob("*.jpg")) == ["1.jpg", "2.jpg", "3.jpg"]
+    assert sorted(scraper.http.calls) == urls
+    assert scraper.stats.media_downloaded == 3
+
+    with (tmp_path / "ledger.csv").open("r", encoding="utf-8") as infile:
+        row = next(csv.DictReader(infile))
+    assert row["cached_media_path"] == "media/python/gallery/1.jpg"
+    assert json.loads(row["cached_media_paths"]) == [f"media/python/gallery/{index}.jpg" for index in (1, 2, 3)]
+    assert row["media_status"] == "downloaded"
+
+    scraper.close()
+
+
+def test_scraper_keeps_gallery_layout_for_one_item_and_failed_first_items(tmp_path) -> None:
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+    single = make_post("single", "https://i.redd.it/only.jpg")
+    single.media_urls, single.is_gallery = ["https://i.redd.it/only.jpg"], True
+    broken = make_post("broken", "https://i.redd.it/gone.jpg")
+    broken.media_urls, broken.is_gallery = ["https://i.redd.it/gone.jpg", "https://i.redd.it/ok.jpg"], True
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/gone.jpg":
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"bytes")
+
+    scraper = RedditScraper(None, config, session=httpx.Client(), client=DummyClient([single, broken]))
+    scraper.http = httpx.Client(transport=httpx.MockTransport(handler))
+    scraper.run()
+    scraper.close()
+
+    with (tmp_path / "ledger.csv").open("r", encoding="utf-8") as infile:
+        rows = {row["post_id"]: row for row in csv.DictReader(infile)}
+    assert rows["single"]["cached_media_path"] == "media/python/single/1.jpg"
+    assert json.loads(rows["single"]["cached_media_paths"]) == ["media/python/single/1.jpg"]
+    assert (tmp_path / "cache" / "media" / "python" / "single" / "1.jpg").exists()
+    assert rows["broken"]["cached_media_path"] == "media/python/broken/2.jpg"
+    assert rows["broken"]["media_status"] == "mixed"
+
+
+def test_scraper_skips_media_over_size_cap(tmp_path) -> None:
+    creds = make_credentials()
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    media_config = MediaConfig(max_bytes=1_000)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, media=media_config, storage=storage_config, ledger=ledger_config)
+
+    methods: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        methods.append(request.method)
+        return httpx.Response(200, headers={"Content-Length": "5000"})
+
+    scraper = RedditScraper(creds, config, session=httpx.Client())
+    scraper.client.close()
+    scraper.client = DummyClient([make_post("large", "https://cdn.example.com/large.mp4")])
+    scraper.http = httpx.Client(transport=httpx.MockTransport(handler))
+
+    scraper.run()
+
+    with (tmp_path / "ledger.csv").open("r", encoding="utf-8") as infile:
+        rows = list(csv.DictReader(infile))
+
+    assert methods == ["HEAD"]
+    assert rows[0]["media_status"] == "oversized"
+    assert rows[0]["cached_media_path"] == ""
+    assert not (tmp_path / "cache" / "media" / "python" / "large.mp4").exists()
+
+    scraper.close()
+
+
+def test_scraper_resumes_partial_media_download(tmp_path) -> None:
+    creds = make_credentials()
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+
+    body = b"0123456789"
+    part = tmp_path / "cache" / ".partial" / "media" / "python" / "clip.mp4.part"
+    part.parent.mkdir(parents=True)
+    part.write_bytes(body[:4])
+    part.with_name(part.name + ".json").write_text(
+        json.dumps({"url": "https://cdn.example.com/clip.mp4", "etag": '"v1"'}), encoding="utf-8"
+    )
+    seen_headers: list[dict[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append({"range": request.headers.get("range"), "if-range": request.headers.get("if-range")})
+        return httpx.Response(
+            206,
+            headers={"Content-Range": "bytes 4-9/10", "ETag": '"v1"'},
+            content=body[4:],
+        )
+
+    scraper = RedditScraper(creds, config, session=httpx.Client())
+    scraper.client.close()
+    scraper.client = DummyClient([make_post("clip", "https://cdn.example.com/clip.mp4")])
+    scraper.http = httpx.Client(transport=httpx.MockTransport(handler))
+
+    scraper.run()
+
+    media_file = tmp_path / "cache" / "media" / "python" / "clip.mp4"
+    meta = json.loads((tmp_path / "cache" / "media" / "python" / "clip.mp4.meta.json").read_text(encoding="utf-8"))
+    assert seen_headers == [{"range": "bytes=4-", "if-range": '"v1"'}]
+    assert media_file.read_bytes() == body
+    assert meta == {"url": "https://cdn.example.com/clip.mp4", "size": 10}
+    assert not part.exists()
+
+    scraper.close()
+
+
+def test_scraper_falls_back_when_guessed_dash_rendition_is_missing(tmp_path) -> None:
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    media_config = MediaConfig(variant="closest", target_width=640)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="none")
+    config = ScraperConfig(queries=query_config, media=media_config, storage=storage_config, ledger=ledger_config)
+    post = RedditClient._parse_post(
+        {
+            "id": "vid",
+            "subreddit": "python",
+            "is_video": True,
+            "media": {"reddit_video": {"fallback_url": "https://v.redd.it/abc/DASH_1080.mp4", "width": 1920, "height": 1080}},
+        },
+        media_config,
+    )
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path)
+        if request.url.path.endswith("DASH_360.mp4"):
+            return httpx.Response(403)
+        return httpx.Response(200, content=b"full")
+
+    scraper = RedditScraper(None, config, session=httpx.Client(), client=DummyClient([post]))
+    scraper.http = httpx.Client(transport=httpx.MockTransport(handler))
+    scraper.run()
+
+    assert post.media_url == "https://v.redd.it/abc/DASH_360.mp4"
+    assert requested == ["/abc/DASH_360.mp4", "/abc/DASH_1080.mp4"]
+    assert (tmp_path / "cache" / "media" / "python" / "vid.mp4").read_bytes() == b"full"
+    assert scraper.stats.media_downloaded == 1
+
+    scraper.close()
+
+
+def test_scraper_records_failed_media_and_keeps_crawling(tmp_path) -> None:
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+    posts = [
+        make_post("short", "https://cdn.example.com/short.mp4"),
+        make_post("down", "https://cdn.example.com/down.mp4"),
+        make_post("fine", "https://cdn.example.com/fine.mp4"),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/short.mp4":
+            # The origin promised 10 bytes but the connection ended after 4.
+            return httpx.Response(200, headers={"Content-Length": "10", "ETag": '"v1"'}, content=b"0123")
+        if request.url.path == "/down.mp4":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, content=b"fine")
+
+    scraper = RedditScraper(None, config, session=httpx.Client(), client=DummyClient(posts))
+    scraper.http = httpx.Client(transport=httpx.MockTransport(handler))
+    stats = scraper.run()
+    scraper.close()
+
+    with (tmp_path / "ledger.csv").open("r", encoding="utf-8") as infile:
+        rows = {row["post_id"]: row for row in csv.DictReader(infile)}
+    assert {post_id: row["media_status"] for post_id, row in rows.items()} == {
+        "short": "incomplete",
+        "down": "failed",
+        "fine": "downloaded",
+    }
+    assert rows["short"]["cached_media_path"] == ""
+    assert (tmp_path / "cache" / ".partial" / "media" / "python" / "short.mp4.part").read_bytes() == b"0123"
+    assert stats.media_failed == 2 and stats.media_downloaded == 1
+
+
+def test_scraper_records_media_that_cannot_be_stored_and_keeps_crawling(tmp_path, monkeypatch) -> None:
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+    posts = [make_post("full", "https://cdn.example.com/full.mp4"), make_post("fine", "https://cdn.example.com/fine.mp4")]
+
+    scraper = RedditScraper(None, config, session=httpx.Client(), client=DummyClient(posts))
+    scraper.http = DummyHTTP(b"bytes")
+    save_file = scraper.storage.save_file
+
+    def disk_full(path, source):
+        if path.endswith("full.mp4"):
+            raise OSError(28, "No space left on device")
+        save_file(path, source)
+
+    monkeypatch.setattr(scraper.storage, "save_file", disk_full)
+    stats = scraper.run()
+    scraper.close()
+
+    with (tmp_path / "ledger.csv").open("r", encoding="utf-8") as infile:
+        statuses = {row["post_id"]: row["media_status"] for row in csv.DictReader(infile)}
+    assert statuses == {"full": "incomplete", "fine": "downloaded"}
+    assert stats.media_failed == 1
+
+
+def test_concurrent_downloads_of_one_path_take_turns(tmp_path) -> None:
+    storage = LocalStorage(tmp_path / "cache")
+    started = threading.Event()
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        started.set()
+        time.sleep(0.3)  # long enough for an unsynchronised second writer to join in
+        return httpx.Response(200, content=b"0123456789")
+
+    results = {}
+
+    def fetch(name: str) -> None:
+        # One downloader per "job", as the manifest runner builds them, sharing storage.
+        downloader = MediaDownloader(
+            httpx.Client(transport=httpx.MockTransport(handler)), storage, partial_path=tmp_path / "cache" / ".partial"
+        )
+        results[name] = downloader.fetch("https://i.redd.it/p1.jpg", "media/pics/p1.jpg")
+
+    first = threading.Thread(target=fetch, args=("new",))
+    first.start()
+    assert started.wait(timeout=5)
+    second = threading.Thread(target=fetch, args=("top",))
+    second.start()
+    first.join()
+    second.join()
+
+    assert requests == ["/p1.jpg"]
+    assert results["new"].status == "downloaded"
+    assert results["top"].status == "cached" and results["top"].path == "media/pics/p1.jpg"
+    assert (tmp_path / "cache" / "media" / "pics" / "p1.jpg").read_bytes() == b"0123456789"
+
+
+def test_scraper_redownloads_truncated_media(tmp_path) -> None:
+    creds = make_credentials()
+    query_config = QueryConfig(queries=[], subreddits=["python"], download_media=True)
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache")
+    ledger_config = LedgerConfig(mode="csv", csv_path=tmp_path / "ledger.csv")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+
+    media_dir = tmp_path / "cache" / "media" / "python"
+    media_dir.mkdir(parents=True)
+    (media_dir / "media.mp4").write_bytes(b"byt")
+    (media_dir / "media.mp4.meta.json").write_text(json.dumps({"size": 5}), encoding="utf-8")
+
+    scraper = RedditScraper(creds, config, session=httpx.Client())
+    scraper.client.close()
+    scraper.client = DummyClient([make_post("media", "https://cdn.example.com/file.mp4")])
+    scraper.http = DummyHTTP(b"bytes")
+
+    scraper.run()
+
+    assert (media_dir / "media.mp4").read_bytes() == b"bytes"
+    assert scraper.http.calls == ["https://cdn.example.com/file.mp4"]
+
+    scraper.close()
+
+
+def test_scraper_skips_unchanged_json_and_snapshots_changes(tmp_path) -> None:
+    creds = make_credentials()
+    query_config = QueryConfig(queries=[], subreddits=["python"])
+    storage_config = StorageConfig(backend="local", local_path=tmp_path / "cache", snapshots=True)
+    ledger_config = LedgerConfig(mode="sqlite", sqlite_path=tmp_path / "ledger.db")
+    config = ScraperConfig(queries=query_config, storage=storage_config, ledger=ledger_config)
+
+    scraper = RedditScraper(creds, config, session=httpx.Client())
+    scraper.client.close()
+    json_file = tmp_path / "cache" / "json" / "python" / "abc.json"
+
+    scraper.client = DummyClient([make_post("abc", None)])
+    scraper.run()
+    first_fingerprint = scraper.ledger.fingerprint("abc")
+
+    scraper.run()
+    assert (scraper.stats.json_written, scraper.stats.json_unchanged) == (1, 1)
+
+    # A matching fingerprint is not enough when the cached copy is gone.
+    json_file.unlink()
+    scraper.run()
+    assert json_file.exists()
+    assert (scraper.stats.json_written, scraper.stats.json_unchanged) == (2, 1)
+
+    edited = make_post("abc", None)
+    edited.raw["title"] = "Edited"
+    scraper.client = DummyClient([edited])
+    json_file.write_text(json.dumps(make_post("abc", None).raw), encoding="utf-8")
+    scraper.run()
+
+    snapshot_file = tmp_path / "cache" / "versions" / "python" / "abc" / f"{first_fingerprint}.json"
+    snapshot = json.loads(snapshot_file.read_text(encoding="utf-8"))
+    assert json.loads(json_file.read_text(encoding="utf-8"))["title"] == "Edited"
+    assert snapshot["changed"] == {}
+    assert snapshot["added"] == ["title"]
+    assert scraper.ledger.fingerprint("abc") != first_fingerprint
+
+    scraper.close()
+
+
+def test_scraper_streams_ndjson_without_storage_or_ledger(tmp_path) -> None:
+    creds = make_credentials()
+    sink_path = tmp_path / "posts.ndjson"
+    config = ScraperConfig(
+        queries=QueryConfig(queries=[], subreddits=["python"], download_media=True),
+        storage=StorageConfig(backend="none", local_path=tmp_path / "cache"),
+        ledger=LedgerConfig(mode="none", csv_path=tmp_path / "ledger.csv"),
+        sink=SinkConfig(target=str(sink_path), record="ledger"),
+    )
+
+    scraper = RedditScraper(creds, config, session=httpx.Client())
+    scraper.client = DummyClient([make_post("one", None), make_post("two", "https://cdn.example.com/a.png")])
+    scraper.http = DummyHTTP(b"bytes")
+
+    stats = scraper.run()
+    scraper.close()
+
+    records = [json.loads(line) for line in sink_path.read_text(encoding="utf-8").splitlines()]
+    assert [record["post_id"] for record in records] == ["one", "two"]
+    assert records[1]["cached_media_path"] == ""
+    assert stats.posts_emitted == 2
+    assert scraper.http.calls == []
+    assert not (tmp_path / "cache").exists()
+    assert not (tmp_path / "ledger.csv").exists()
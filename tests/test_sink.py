@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import io
+import json
+
+from social_crawler.sink import NdjsonSink
+
+
+class ClosedPipe(io.StringIO):
+    def write(self, data: str) -> int:
+        raise BrokenPipeError
+
+
+def test_ndjson_sink_writes_one_compact_line_per_record() -> None:
+    stream = io.StringIO()
+    sink = NdjsonSink(stream)
+
+    assert sink.write({"id": "abc", "score": 1})
+    assert sink.write({"id": "def"})
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["abc", "def"]
+    assert lines[0] == '{"id":"abc","score":1}'
+
+
+def test_ndjson_sink_reports_closed_reader() -> None:
+    sink = NdjsonSink(ClosedPipe())
+
+    assert sink.write({"id": "abc"}) is False
+    assert sink.closed
+    assert sink.write({"id": "def"}) is False
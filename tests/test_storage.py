@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import json
+import sys
 from types import SimpleNamespace
 
-from social_crawler.storage import GCSStorage, LocalStorage
+import pytest
+
+from social_crawler.storage import GCSStorage, LocalStorage, build_storage_backend
 
 
 def test_local_storage_round_trip(tmp_path) -> None:
@@ -18,6 +21,10 @@ def test_local_storage_round_trip(tmp_path) -> None:
         payload = json.load(infile)
 
     assert payload["value"] == 1
+    assert storage.size("foo/data.bin") == len(b"payload")
+    assert storage.size("foo/missing.bin") is None
+    assert storage.load_json("foo/data.json") == {"value": 1}
+    assert storage.load_json("foo/missing.json") is None
 
 
 def test_gcs_storage_uses_blob_operations(monkeypatch) -> None:
@@ -62,3 +69,12 @@ def test_gcs_storage_uses_blob_operations(monkeypatch) -> None:
     assert json.loads(uploads["prefix/foo.json"]["data"]) == {"value": 2}
     assert uploads["prefix/bar.bin"]["data"] == b"bytes"
     assert backend.exists("bar.bin") is True
+
+
+def test_build_storage_backend_loads_local_without_gcs(tmp_path) -> None:
+    backend = build_storage_backend("local", local_path=tmp_path, gcs_bucket=None, gcs_prefix="")
+
+    assert isinstance(backend, LocalStorage)
+    with pytest.raises(ValueError):
+        build_storage_backend("ftp", local_path=tmp_path, gcs_bucket=None, gcs_prefix="")
+    assert "google.cloud.storage" not in sys.modules
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import threading
+
+from social_crawler.storage_gcs import GCSStorage
+from social_crawler.storage_tiered import TieredStorage
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", path: str) -> None:
+        self.bucket = bucket
+        self.path = path
+
+    @property
+    def size(self) -> int:
+        return len(self.bucket.objects[self.path])
+
+    def _put(self, data: bytes) -> None:
+        self.bucket.before_put()
+        with self.bucket.lock:
+            if self.bucket.failures:
+                self.bucket.failures -= 1
+                raise ConnectionError("bucket unavailable")
+            self.bucket.objects[self.path] = data
+
+    def upload_from_string(self, data, content_type: str | None = None) -> None:
+        self._put(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def upload_from_filename(self, filename: str) -> None:
+        with open(filename, "rb") as infile:
+            self._put(infile.read())
+
+    def exists(self) -> bool:
+        return self.path in self.bucket.objects
+
+    def download_as_text(self) -> str:
+        return self.bucket.objects[self.path].decode("utf-8")
+
+
+class FakeBucket:
+    def __init__(self, failures: int = 0) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def before_put(self) -> None:
+        pass
+
+    def blob(self, path: str) -> FakeBlob:
+        return FakeBlob(self, path)
+
+    def get_blob(self, path: str) -> FakeBlob | None:
+        return FakeBlob(self, path) if path in self.objects else None
+
+
+class FakeClient:
+    def __init__(self, bucket: FakeBucket) -> None:
+        self._bucket = bucket
+
+    def bucket(self, name: str) -> FakeBucket:
+        return self._bucket
+
+
+class SlowFirstWriteBucket(FakeBucket):
+    """Blocks the first upload until ``release`` is set; ``overtaken`` flags any later upload."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.overtaken = threading.Event()
+        self.puts = 0
+
+    def before_put(self) -> None:
+        with self.lock:
+            self.puts += 1
+            first = self.puts == 1
+        if first:
+            self.started.set()
+            self.release.wait(timeout=5)
+        elif not self.release.is_set():
+            self.overtaken.set()
+
+
+def make_remote(bucket: FakeBucket) -> GCSStorage:
+    return GCSStorage("test-bucket", prefix="p", client=FakeClient(bucket))
+
+
+def test_tiered_storage_uploads_with_retries_and_evicts(tmp_path) -> None:
+    bucket = FakeBucket(failures=2)
+    storage = TieredStorage(make_remote(bucket), tmp_path / "staging", workers=2, backoff=0)
+    source = tmp_path / "media.bin"
+    source.write_bytes(b"media-bytes")
+
+    storage.save_json("json/a.json", {"value": 1})
+    storage.save_file("media/a.bin", source)
+    assert storage.exists("json/a.json")
+    assert storage.load_json("json/a.json") == {"value": 1}
+    storage.close()
+
+    assert json.loads(bucket.objects["p/json/a.json"]) == {"value": 1}
+    assert bucket.objects["p/media/a.bin"] == b"media-bytes"
+    assert storage.pending() == 0 and storage.failed == {}
+    assert not list((tmp_path / "staging" / "files").rglob("*.*"))
+    assert (tmp_path / "staging" / "journal.jsonl").read_text() == ""
+    assert storage.exists("media/a.bin")
+    assert storage.size("media/a.bin") == len(b"media-bytes")
+
+
+def test_tiered_storage_replays_journal_after_failed_uploads(tmp_path) -> None:
+    bucket = FakeBucket(failures=100)
+    storage = TieredStorage(make_remote(bucket), tmp_path / "staging", max_attempts=2, backoff=0)
+    storage.save_bytes("media/b.bin", b"payload")
+    storage.close()
+
+    assert "media/b.bin" in storage.failed
+    assert bucket.objects == {}
+    assert storage.size("media/b.bin") == len(b"payload")
+
+    bucket.failures = 0
+    restarted = TieredStorage(make_remote(bucket), tmp_path / "staging")
+    restarted.close()
+
+    assert bucket.objects["p/media/b.bin"] == b"payload"
+    assert restarted.pending() == 0
+
+
+def test_tiered_storage_never_lets_a_stale_upload_overwrite_a_newer_write(tmp_path) -> None:
+    bucket = SlowFirstWriteBucket()
+    storage = TieredStorage(make_remote(bucket), tmp_path / "staging", workers=4, backoff=0)
+
+    storage.save_json("json/a.json", {"v": 1})
+    assert bucket.started.wait(timeout=5)
+    storage.save_json("json/a.json", {"v": 2})
+    # Give a concurrent upload of v2 the chance to finish before the stale v1 upload does.
+    bucket.overtaken.wait(timeout=0.5)
+    bucket.release.set()
+    storage.close()
+
+    assert not bucket.overtaken.is_set()
+    assert json.loads(bucket.objects["p/json/a.json"]) == {"v": 2}
+    assert storage.pending() == 0
+    assert not (tmp_path / "staging" / "files" / "json" / "a.json").exists()
+    assert storage.load_json("json/a.json") == {"v": 2}
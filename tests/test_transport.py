@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+
+import httpx
+
+from social_crawler.config import HttpConfig
+from social_crawler.transport import HttpPool
+
+
+class ConnectingTransport(httpx.BaseTransport):
+    """Mock transport that reports a new connection for the first request to each host."""
+
+    def __init__(self) -> None:
+        self.connected: set[str] = set()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host not in self.connected:
+            self.connected.add(request.url.host)
+            request.extensions["trace"]("connection.connect_tcp.complete", {})
+        return httpx.Response(200, content=b"ok")
+
+
+def test_http_pool_tracks_connection_reuse_per_host() -> None:
+    pool = HttpPool(HttpConfig(), transport=ConnectingTransport())
+
+    for _ in range(3):
+        pool.client.get("https://oauth.reddit.com/api")
+    pool.client.get("https://i.redd.it/pic.png")
+
+    stats = pool.stats()
+    assert stats["oauth.reddit.com"].requests == 3
+    assert stats["oauth.reddit.com"].connections_opened == 1
+    assert stats["oauth.reddit.com"].reused == 2
+    assert stats["i.redd.it"].reused == 0
+    pool.close()
+
+
+def test_http_pool_limits_concurrent_requests_per_host() -> None:
+    pool = HttpPool(HttpConfig(per_host_connections=1), transport=httpx.MockTransport(lambda _: httpx.Response(200)))
+    second_started = threading.Event()
+
+    def second_request() -> None:
+        with pool.client.stream("GET", "https://v.redd.it/b.mp4"):
+            second_started.set()
+
+    with pool.client.stream("GET", "https://v.redd.it/a.mp4"):
+        worker = threading.Thread(target=second_request)
+        worker.start()
+        assert not second_started.wait(0.2)
+    worker.join(timeout=5)
+
+    assert second_started.is_set()
+    pool.close()